@@ -1,12 +1,15 @@
 import streamlit as st
-from logic.query_llm import process_resume, load_resume, validate_keyword_usage
-import asyncio
-import json
-from utils.format_resume_data import render_resume
+from logic.query_llm import response_cache
+from llm.usage import get_usage_summary
+import time
+from utils.format_resume_data import render_resume, ProgressiveResumeRenderer
 import logging
-from db.operations import insert_application, update_application_status
-from utils.helpers import sanitize_filename
-import re
+from bson import ObjectId
+from db.application_store import get_application_store
+from utils.helpers import sanitize_filename, format_keywords
+from logic.prompt_assets import preload_prompt_assets
+from logic.duplicates import find_near_duplicates
+from logic.job_queue import ACTIVE_STATES, get_job_events, job_store, start_job_workers, submit_tailor_job
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
@@ -18,17 +21,31 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Load the base resume and action-verb block once per process (cheap no-op on reruns)
+preload_prompt_assets()
+# Resume jobs queued before a restart; no-op once the workers are running
+start_job_workers()
+
 st.title("Resume Tailor")
 st.write("Generate ATS-optimized resumes with keyword integration")
 
-def format_keywords(keywords):
-    """Parse keywords with multiple delimiters"""
-    if not keywords:
-        return []
-    split_pattern = r'[,\n;]'
-    keywords = re.split(split_pattern, keywords)
-    cleaned = [kw.strip().lower() for kw in keywords if kw.strip()]
-    return list(set(cleaned))
+def start_tailor_job(job_params):
+    """
+    Queue a tailoring job and follow it. The job runs in the background worker
+    pool and this page only polls it, so reruns and refreshes do not lose the result.
+    """
+    tailor_job_id = submit_tailor_job(job_params)
+    st.session_state.tailor_job_id = tailor_job_id
+    st.session_state.pop("application_id", None)
+    st.query_params["job"] = tailor_job_id
+
+
+# Maps the "Tailoring mode" options to process_resume strategies
+TAILORING_STRATEGIES = {
+    "Whole resume": "full",
+    "Parallel sections": "sections",
+    "Changed bullets only": "patch",
+}
 
 # Main Form
 with st.form(key="tailor_form"):
@@ -67,6 +84,29 @@ with st.form(key="tailor_form"):
         placeholder="Any extra guidance for the AI? e.g., Focus on Python experience, mention open-source contributions..."
     )
 
+    bypass_cache = st.checkbox(
+        "Bypass response cache",
+        help="Always call the AI, even if an identical request was answered before."
+    )
+    tailoring_mode = st.radio(
+        "Tailoring mode",
+        options=["Whole resume", "Parallel sections", "Changed bullets only"],
+        index=0,
+        horizontal=True,
+        help="Parallel sections rewrites experience and projects with concurrent AI calls, then skills. "
+             "Changed bullets only asks the AI for just the edits, which is faster and cheaper."
+    )
+    stream_output = st.checkbox(
+        "Stream output",
+        value=True,
+        help="Show each resume section as soon as the AI finishes writing it."
+    )
+    hedge_requests = st.checkbox(
+        "Hedge across providers",
+        help="If the selected model is slow or fails, also ask the other one and use whichever "
+             "answers first. Hedged requests are not streamed."
+    )
+
     st.divider()
     submitted = st.form_submit_button("Generate Tailored Resume")
 
@@ -75,81 +115,158 @@ with st.form(key="tailor_form"):
         if not all([company, job_title, job_description, keywords_text]):
             st.error("Please fill out the required fields (Company, Title, Job Description, Keywords).")
         else:
-            with st.spinner("Optimizing resume..."):
-                try:
-                    job_keywords = format_keywords(keywords_text)
-                    sanitized_name = sanitize_filename(company, job_title, job_id)
-
-                    st.write("## Generated Filename")
-                    st.code(sanitized_name, language="text")
-
-                    # Process resume with LLM
-                    enhanced_resume, missing_kws = asyncio.run(
-                        process_resume(
-                            job_description,
-                            additional_instructions,
-                            company,
-                            job_title,
-                            api_choice.lower(),
-                            job_id,
-                            job_keywords
-                        )
-                    )
-
-                    # Load original resume
-                    original_resume = load_resume()
-
-                    # Validate keyword usage again (in case LLM missed any)
-                    missing_kws = validate_keyword_usage(
-                        original_resume,
-                        enhanced_resume,
-                        job_keywords
-                    )
-
-                    # Insert record into DB
-                    application_id = insert_application(
-                        company, job_title, job_id,
-                        enhanced_resume, job_description,
-                        sanitized_name
-                    )
-                    st.session_state.application_id = application_id
-
-                    st.success("Resume tailored successfully!")
-                    render_resume(enhanced_resume)
-
-                    if missing_kws:
-                        st.warning(
-                            f"Couldn't integrate these keywords: {', '.join(missing_kws)}\n\n"
-                            "**Action Required:**\n"
-                            "1. Add them manually if accurate.\n"
-                            "2. Provide more context for auto-integration.\n"
-                            "3. Verify the skill authenticity."
-                        )
-
-                except json.JSONDecodeError:
-                    st.error("Failed to parse the AI response. Please try again.")
-                    logging.error("Invalid JSON response: %s", enhanced_resume)
-                except Exception as e:
-                    st.error("A critical error occurred. Check the logs for more details.")
-                    logging.exception("Tailoring error: %s", str(e))
+            job_params = {
+                "job_description": job_description,
+                "additional_instructions": additional_instructions,
+                "company": company,
+                "title": job_title,
+                "api_choice": "openai" if api_choice == "Open AI" else "deepseek",
+                "job_id": job_id,
+                "keywords": format_keywords(keywords_text),
+                "use_cache": not bypass_cache,
+                "stream": stream_output and not hedge_requests,
+                "strategy": TAILORING_STRATEGIES[tailoring_mode],
+                "hedge": hedge_requests,
+            }
+            # Reposted jobs: offer to reuse an earlier resume instead of a new LLM call
+            duplicates = find_near_duplicates(job_description)
+            if duplicates:
+                st.session_state.pending_job = job_params
+                st.session_state.pending_duplicates = duplicates
+            else:
+                start_tailor_job(job_params)
+
+
+if st.session_state.get("pending_job"):
+    job_params = st.session_state.pending_job
+    best = st.session_state.pending_duplicates[0]
+    st.info(
+        "This job description is a near-duplicate of one you already tailored for:\n\n" +
+        "\n".join(f"- **{match['company_name']} - {match['title']}** ({match['similarity']:.0%} similar)"
+                   for match in st.session_state.pending_duplicates)
+    )
+    col1, col2, col3 = st.columns(3)
+    choice = None
+    if col1.button(f"Reuse {best['company_name']} resume", help="Save the earlier resume for this job. No AI call."):
+        choice = dict(job_params, base_application_id=str(best["application_id"]), reuse="copy")
+    if col2.button("Adapt it", help="Ask the AI only for the bullets to change in the earlier resume."):
+        choice = dict(job_params, base_application_id=str(best["application_id"]), reuse="adapt",
+                      strategy="patch", stream=False)
+    if col3.button("Tailor from scratch"):
+        choice = job_params
+    if choice is not None:
+        del st.session_state.pending_job, st.session_state.pending_duplicates
+        start_tailor_job(choice)
+        st.rerun()
+
+
+def show_tailor_job(tailor_job_id):
+    """Show a tailoring job: stream its sections while it runs, then its result."""
+    job = job_store.get(tailor_job_id)
+    if job is None:
+        st.warning("This tailoring job no longer exists.")
+        return
+    params = job["params"]
+    st.write("## Generated Filename")
+    st.code(sanitize_filename(params["company"], params["title"], params["job_id"]), language="text")
+
+    # Streamed sections are a preview: the worker drops a job's events once it
+    # finishes, so the last ones may never be seen here and the preview is
+    # replaced by the final resume below
+    preview = st.empty()
+    if job["status"] in ACTIVE_STATES:
+        renderer = None
+        if params["stream"]:
+            with preview.container():
+                renderer = ProgressiveResumeRenderer()
+        rendered = 0
+        with st.spinner("Optimizing resume..."):
+            while job["status"] in ACTIVE_STATES:
+                # Sections arrive on the LLM event loop thread; render them here
+                if renderer:
+                    for event in get_job_events(tailor_job_id, rendered):
+                        renderer.handle(event)
+                        rendered += 1
+                time.sleep(0.2)
+                job = job_store.get(tailor_job_id)
+
+    if job["status"] == "failed":
+        st.error(f"Tailoring failed: {job['error']}")
+        return
+
+    result = job["result"]
+    st.session_state.application_id = result["application_id"]
+    st.success("Resume tailored successfully!")
+    if result["matching_score"] is not None:
+        st.metric("Match Score", f"{result['matching_score']:.0%}")
+    cache_stats = response_cache.stats()
+    st.caption(
+        f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['entries']} stored"
+    )
+    usage = result["usage"]
+    if usage["prompt_tokens"]:
+        st.caption(
+            f"Provider prompt cache: {usage['cached_tokens']} of {usage['prompt_tokens']} prompt tokens cached, "
+            f"{usage['completion_tokens']} completion tokens, {usage['latency_seconds']:.1f}s"
+        )
+    provider_totals = get_usage_summary()
+    if provider_totals:
+        st.caption("Since startup: " + "; ".join(
+            f"{provider} {totals['requests']} calls, {totals['cache_hit_ratio']:.0%} of prompt tokens cached, "
+            f"{totals['avg_latency_seconds']:.1f}s average"
+            for provider, totals in provider_totals.items()
+        ))
+    preview.empty()
+    render_resume(result["enhanced_resume"])
+
+    missing_kws = result["missing_keywords"]
+    if missing_kws:
+        st.warning(
+            f"Couldn't integrate these keywords: {', '.join(missing_kws)}\n\n"
+            "**Action Required:**\n"
+            "1. Add them manually if accurate.\n"
+            "2. Provide more context for auto-integration.\n"
+            "3. Verify the skill authenticity."
+        )
+
+
+current_job = st.session_state.get("tailor_job_id") or st.query_params.get("job")
+if current_job:
+    try:
+        show_tailor_job(current_job)
+    except Exception as e:
+        st.error("A critical error occurred. Check the logs for more details.")
+        logging.exception("Tailoring error: %s", str(e))
+
+recent_jobs = job_store.recent(limit=10)
+if recent_jobs:
+    with st.expander("Recent tailoring jobs"):
+        for job in recent_jobs:
+            col1, col2 = st.columns([4, 1])
+            col1.write(f"**{job['params']['company']} - {job['params']['title']}** · {job['status']}")
+            if col2.button("Open", key=f"open_job_{job['id']}"):
+                st.session_state.tailor_job_id = job["id"]
+                st.query_params["job"] = job["id"]
+                st.rerun()
 
 # Additional controls outside the form
 if st.session_state.get("application_id"):
     # "Applied" button updates the application status
     if st.button("Mark as Applied"):
-        from db.operations import update_application_status
-        update_application_status(st.session_state.application_id, "applied")
+        # Updates the tracker's cached pages and metrics in place
+        get_application_store().update_status(ObjectId(st.session_state.application_id), "applied")
         st.success("Application status updated to 'applied'!")
         logging.info("Application status updated to applied for ID: %s",
                      st.session_state.application_id)
 
-        # Clear cache, session state, and refresh
-        st.cache_data.clear()
-        st.cache_resource.clear()
+        # Reset the form and refresh
         st.session_state.clear()
+        st.query_params.clear()
         st.rerun()
 
 st.divider()
 if st.button("Clear Session"):
     st.session_state.clear()
+    st.query_params.clear()
     st.rerun()
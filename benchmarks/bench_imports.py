@@ -0,0 +1,73 @@
+"""
+Import-time report for the app's entry-point modules.
+
+    python -m benchmarks.bench_imports [--top 10] [module ...]
+
+Each module is imported in a fresh interpreter with `-X importtime`; the
+report shows its cumulative import time, the slowest packages it pulled in,
+and which of the heavy libraries (NLTK, scikit-learn, SciPy, the OpenAI SDK,
+httpx) were loaded eagerly. Modules that read st.secrets at import need a
+.streamlit/secrets.toml to import at all.
+"""
+import argparse
+import subprocess
+import sys
+
+MODULES = (
+    "utils.normalization",
+    "utils.text_processing",
+    "prompts.prompt_engineering",
+    "llm.clients",
+    "logic.query_llm",
+    "logic.matching",
+)
+
+# Libraries that should only be imported on first use
+HEAVY_PACKAGES = ("nltk", "sklearn", "scipy", "openai", "httpx")
+
+CHECK_LOADED = (
+    "import sys; import {module}; "
+    "print(','.join(p for p in {packages!r} if p in sys.modules))"
+)
+
+
+def import_profile(module):
+    """Import `module` in a fresh interpreter. Returns (rows, loaded_heavy, error)."""
+    command = [sys.executable, "-X", "importtime", "-c",
+               CHECK_LOADED.format(module=module, packages=HEAVY_PACKAGES)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two spaces per level
+        rows.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"
+        return rows, [], error
+    loaded = [p for p in result.stdout.strip().split(",") if p]
+    return rows, loaded, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of the app modules.")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level packages to list.")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        rows, loaded, error = import_profile(module)
+        if error:
+            print(f"{module}: {error}")
+            continue
+        total = next((cumulative for cumulative, _, name in rows if name == module), 0)
+        print(f"{module}: {total / 1000:.1f} ms")
+        print(f"  heavy packages loaded: {', '.join(loaded) or 'none'}")
+        top_level = sorted((row for row in rows if not row[2].startswith(" ")), reverse=True)
+        for cumulative, _, name in top_level[:args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Per-document cost of text normalization on long job descriptions.
+
+    python -m benchmarks.bench_normalization [--docs 50] [--words 1500]
+
+"before" is the original clean_text + preprocess_text pair (two independent
+regex passes, word_tokenize, an uncached lemmatizer and INFO logging of the
+whole text). "after" is utils.normalization. Requires the NLTK punkt,
+stopwords and wordnet data.
+"""
+import argparse
+import io
+import logging
+import random
+import re
+import time
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+from utils import normalization
+
+VOCABULARY = (
+    "we are looking for a senior software engineer to design build and operate distributed "
+    "systems in python go and java you will work with kafka kubernetes aws and postgresql "
+    "to deliver reliable apis for our customers the ideal candidate has experience with "
+    "microservices ci cd pipelines observability and on-call rotations, strong communication "
+    "skills and a passion for mentoring teammates. remote friendly; competitive salary & equity!"
+).split()
+
+# --- Original implementations, kept verbatim as the baseline ---------------------
+
+STOP_WORDS = None
+lemmatizer = None
+
+
+def legacy_clean_text(text):
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    word_tokens = word_tokenize(text)
+    filtered_text = []
+    prev_word = ""
+    for word in word_tokens:
+        if word not in STOP_WORDS or prev_word not in STOP_WORDS:
+            filtered_text.append(word)
+        prev_word = word
+    cleaned_text = ' '.join(filtered_text)
+    cleaned_text = '. '.join(s.capitalize() for s in cleaned_text.split('. '))
+    logging.info("Cleaned text: %s", cleaned_text)
+    return cleaned_text
+
+
+def legacy_lemmatize_text(text):
+    tokens = text.split()
+    lemmatized_tokens = [lemmatizer.lemmatize(token) for token in tokens]
+    lemmatized = ' '.join(lemmatized_tokens)
+    logging.info("Lemmatized text: %s", lemmatized)
+    return lemmatized
+
+
+def legacy_preprocess_text(text):
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    preprocessed = legacy_lemmatize_text(text)
+    logging.info("Preprocessed text: %s", preprocessed)
+    return preprocessed
+
+# ---------------------------------------------------------------------------------
+
+
+def make_documents(count, words, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(VOCABULARY) for _ in range(words)) for _ in range(count)]
+
+
+def time_per_doc(func, documents):
+    start = time.perf_counter()
+    for doc in documents:
+        func(doc)
+    return (time.perf_counter() - start) / len(documents) * 1000
+
+
+def main():
+    global STOP_WORDS, lemmatizer
+    parser = argparse.ArgumentParser(description="Benchmark text normalization.")
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--words", type=int, default=1500)
+    args = parser.parse_args()
+
+    # Log to memory at INFO, like the app's basicConfig, without flooding the terminal
+    logging.basicConfig(level=logging.INFO, stream=io.StringIO(), force=True)
+    STOP_WORDS = set(stopwords.words('english'))
+    lemmatizer = WordNetLemmatizer()
+    documents = make_documents(args.docs, args.words)
+
+    for doc in documents[:5]:
+        assert legacy_clean_text(doc) == normalization.clean_text(doc)
+        assert legacy_preprocess_text(doc) == normalization.preprocess_text(doc)
+    normalization.tokenize.cache_clear()
+
+    def before(doc):
+        legacy_clean_text(doc)
+        legacy_preprocess_text(doc)
+
+    def after(doc):
+        normalization.clean_text(doc)
+        normalization.preprocess_text(doc)
+
+    fresh = make_documents(args.docs, args.words, seed=1)
+    results = [
+        ("before", time_per_doc(before, documents)),
+        ("after (new documents)", time_per_doc(after, fresh)),
+        ("after (repeat documents)", time_per_doc(after, fresh)),
+    ]
+    print(f"{args.docs} documents x {args.words} words")
+    for label, ms in results:
+        print(f"  {label:<26} {ms:8.2f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Stored size of applications in the full-copy and compact (delta + compressed
+job description) layouts, on a synthetic collection shaped like real data.
+
+    python -m benchmarks.bench_storage [--docs 500] [--rewrite 0.5] [--resume data/resume.json]
+
+Each tailored resume rewrites a `--rewrite` share of the experience/project
+bullets and extends the skills, as the tailoring prompt asks for. The whole
+document also counts the MinHash signature (an int array before, packed
+bytes after). Sizes are BSON bytes when pymongo is installed, JSON bytes
+otherwise.
+"""
+import argparse
+import copy
+import json
+import random
+import time
+from db.storage import encode_content, expand_content, resume_version
+from utils.minhash import minhash_signature, signature_to_bytes
+
+try:
+    import bson
+
+    def encoded_size(doc):
+        return len(bson.encode(doc))
+    SIZE_UNIT = "BSON"
+except ImportError:
+    def encoded_size(doc):
+        return len(json.dumps(doc, default=lambda value: "x" * len(value)))
+    SIZE_UNIT = "JSON"
+
+SENTENCES = [
+    "We are looking for a senior software engineer to design, build and operate distributed systems.",
+    "You will work closely with product managers, designers and other engineers across the company.",
+    "Experience with Python, Go or Java and with cloud platforms such as AWS or GCP is required.",
+    "Familiarity with Kafka, Kubernetes, Terraform and PostgreSQL is a strong plus.",
+    "You will own services end to end, from design reviews to on-call rotations and incident reviews.",
+    "Strong communication skills and a passion for mentoring teammates are essential.",
+    "We offer a competitive salary, equity, comprehensive health benefits and a remote-friendly culture.",
+    "The ideal candidate has shipped customer-facing APIs at scale and cares about reliability.",
+    "Build CI/CD pipelines, observability dashboards and automated testing for critical services.",
+    "We are an equal opportunity employer and value diversity at our company.",
+    "Collaborate with data science teams to productionize machine learning models.",
+    "Drive technical decisions, write design documents and review code from peers.",
+]
+TOPICS = ["payments", "search", "billing", "identity", "analytics", "logistics", "messaging", "ads"]
+KEYWORDS = ["Kafka", "Kubernetes", "Terraform", "gRPC", "PostgreSQL", "Redis", "Airflow", "Spark",
+            "GraphQL", "React", "TypeScript", "Docker", "Prometheus", "Snowflake", "dbt", "FastAPI"]
+
+
+def make_base_resume(rng):
+    def bullet():
+        return (f"Built a {rng.choice(TOPICS)} service handling {rng.randint(2, 90)}M requests per day, "
+                f"cutting p99 latency by {rng.randint(10, 70)}% and infrastructure cost by "
+                f"${rng.randint(20, 400)}K a year through caching and query tuning.")
+    return {
+        "name": "Jane Doe",
+        "contact": {"email": "jane.doe@example.com", "phone": "+1 555 0100",
+                    "linkedin": "linkedin.com/in/janedoe", "github": "github.com/janedoe"},
+        "education": [{"school": "State University", "degree": "M.S. Computer Science",
+                       "dates": "2018 - 2020", "gpa": "3.9"},
+                      {"school": "City College", "degree": "B.S. Computer Engineering",
+                       "dates": "2014 - 2018", "gpa": "3.7"}],
+        "coursework": ["Distributed Systems", "Databases", "Operating Systems", "Machine Learning",
+                       "Algorithms", "Computer Networks", "Cloud Computing", "Compilers"],
+        "experience": [{"company": f"Company {i}", "title": "Software Engineer", "dates": "2020 - 2024",
+                        "points": [bullet() for _ in range(6)]} for i in range(3)],
+        "projects": [{"title": f"Project {i}", "points": [bullet() for _ in range(3)]} for i in range(3)],
+        "skills": [{"label": label, "content": ", ".join(rng.sample(KEYWORDS, 6))}
+                   for label in ("Languages", "Frameworks", "Cloud", "Data", "Tools")],
+    }
+
+
+def tailor(base, rng, rewrite):
+    resume = copy.deepcopy(base)
+    for section in ("experience", "projects"):
+        for entry in resume[section]:
+            entry["points"] = [f"{point[:-1]} using {', '.join(rng.sample(KEYWORDS, 2))}."
+                               if rng.random() < rewrite else point for point in entry["points"]]
+    for category in resume["skills"]:
+        category["content"] += ", " + ", ".join(rng.sample(KEYWORDS, 2))
+    return resume
+
+
+def make_job_description(rng):
+    paragraphs = [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 6)))
+                  for _ in range(rng.randint(5, 9))]
+    keywords = ", ".join(rng.sample(KEYWORDS, 8))
+    return (f"About the {rng.choice(TOPICS)} team\n\n" + "\n\n".join(paragraphs)
+            + f"\n\nTech stack: {keywords}\nJob ID: {rng.randint(100000, 999999)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compact application storage.")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--rewrite", type=float, default=0.5,
+                        help="Share of bullets each tailored resume rewrites.")
+    parser.add_argument("--resume", help="Base resume JSON to use instead of the synthetic one.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.resume:
+        with open(args.resume, "r") as f:
+            base = json.load(f)
+    else:
+        base = make_base_resume(rng)
+    metadata = {"company_name": "Company", "title": "Software Engineer", "job_id": "123456",
+                "primary_status": "not applied", "secondary_status": "", "file_name": "Company_SWE.pdf",
+                "favorite": False, "sent_cold_email": False, "sent_linkedin_message": False,
+                "matching_score": 0.42, "date_applied": None}
+
+    full_bytes = compact_bytes = heavy_full = heavy_compact = 0
+    encode_seconds = expand_seconds = 0.0
+    for _ in range(args.docs):
+        resume = tailor(base, rng, args.rewrite) if isinstance(base, dict) and "experience" in base else base
+        job_description = make_job_description(rng)
+        full = {"resume_content": resume, "job_description": job_description}
+        signature = minhash_signature(job_description)
+
+        start = time.perf_counter()
+        compact, _ = encode_content(resume, job_description, base)
+        encode_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        expanded = expand_content(compact, lambda version: base)
+        expand_seconds += time.perf_counter() - start
+        assert expanded == full
+
+        heavy_full += encoded_size(full)
+        heavy_compact += encoded_size(compact)
+        full_bytes += encoded_size({**metadata, **full, "jd_signature": [int(value) for value in signature]})
+        compact_bytes += encoded_size({**metadata, **compact, "jd_signature": signature_to_bytes(signature)})
+
+    base_bytes = encoded_size({"_id": resume_version(base), "resume": base})
+    print(f"{args.docs} applications, {args.rewrite:.0%} of bullets rewritten ({SIZE_UNIT} bytes)")
+    print(f"  resume + job description   full {heavy_full / args.docs:8.0f}   "
+          f"compact {heavy_compact / args.docs:8.0f}   {heavy_full / heavy_compact:5.1f}x smaller")
+    print(f"  whole document             full {full_bytes / args.docs:8.0f}   "
+          f"compact {compact_bytes / args.docs:8.0f}   {full_bytes / compact_bytes:5.1f}x smaller")
+    print(f"  collection total           full {full_bytes:8d}   compact {compact_bytes + base_bytes:8d}"
+          f"   (includes one {base_bytes}-byte base resume)")
+    print(f"  encode {encode_seconds / args.docs * 1000:.2f} ms/doc, "
+          f"expand {expand_seconds / args.docs * 1000:.2f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
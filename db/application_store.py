@@ -0,0 +1,282 @@
+"""
+Process-wide cache of the tracker's reads (pages, counts, company names,
+metrics) that is maintained write by write instead of being cleared.
+
+An update patches the changed fields of the one cached document, unless the
+fields decide which documents a cached query matches or how it is sorted, in
+which case only those cached queries are dropped. A delete removes the
+document from the pages holding it. Inserts drop the cached pages, since a
+new document can land on any of them. Writes made by other processes are
+picked up by an optional MongoDB change stream (TRACKER_CHANGE_STREAM);
+without one, the whole cache expires every TRACKER_CACHE_TTL_SECONDS so they
+still show up after a while.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+from db.operations import (
+    SORT_SPECS,
+    TEXT_INDEX_WEIGHTS,
+    bulk_write_applications,
+    count_applications,
+    delete_application,
+    effective_sort_key,
+    get_application_metrics,
+    get_applications_collection,
+    get_applications_paginated,
+    get_company_names,
+    update_application_status,
+    update_application_toggle,
+)
+
+# Cached pages kept at most (least recently used are dropped first)
+MAX_CACHED_PAGES = 500
+# Without a change stream, cached reads are dropped this often so writes made
+# by other processes (the batch CLI, other app instances) show up; 0 disables
+CACHE_TTL_SECONDS = float(st.secrets.get("TRACKER_CACHE_TTL_SECONDS", 30))
+
+
+def query_fields(query):
+    """Document fields a query built by build_applications_query() filters on."""
+    fields = set()
+    if isinstance(query, dict):
+        for key, value in query.items():
+            if key == "$text":
+                fields.update(TEXT_INDEX_WEIGHTS)
+            elif key.startswith("$"):
+                fields |= query_fields(value)
+            else:
+                fields.add(key)
+    elif isinstance(query, list):
+        for clause in query:
+            fields |= query_fields(clause)
+    return fields
+
+
+def _query_key(query):
+    return json.dumps(query or {}, sort_keys=True, default=str)
+
+
+class ApplicationStore:
+    """Shared, incrementally maintained cache of tracker reads."""
+
+    def __init__(self, ttl_seconds=CACHE_TTL_SECONDS):
+        # (query_key, sort_key, page, page_size) -> list of summary documents
+        self._pages = OrderedDict()
+        # query_key -> fields it filters on, for every query with a cached page or count
+        self._query_fields = {}
+        self._counts = {}
+        self._company_names = None
+        self._metrics = None
+        self._lock = threading.Lock()
+        self._ttl_seconds = ttl_seconds
+        self._expires_at = time.monotonic() + ttl_seconds
+        self._watcher = None
+        # Ids deleted by this process, whose change stream events are already applied
+        self._deleted = set()
+
+    # -- Reads ---------------------------------------------------------------
+
+    def _expire(self):
+        """Drop every cached read once the TTL has passed, unless a change stream keeps them current."""
+        if self._watcher is not None or not self._ttl_seconds:
+            return
+        now = time.monotonic()
+        if now >= self._expires_at:
+            self.clear()
+            self._expires_at = now + self._ttl_seconds
+
+    def get_page(self, query, sort_key, page, page_size):
+        self._expire()
+        # Cache and invalidate pages under the order they really have
+        sort_key = effective_sort_key(query, sort_key)
+        key = (_query_key(query), sort_key, page, page_size)
+        with self._lock:
+            docs = self._pages.get(key)
+            if docs is not None:
+                self._pages.move_to_end(key)
+                return [dict(doc) for doc in docs]
+        docs = get_applications_paginated(page=page, page_size=page_size, query=query, sort_key=sort_key)
+        with self._lock:
+            self._pages[key] = docs
+            self._query_fields[key[0]] = query_fields(query)
+            if len(self._pages) > MAX_CACHED_PAGES:
+                while len(self._pages) > MAX_CACHED_PAGES:
+                    self._pages.popitem(last=False)
+                self._prune_query_fields()
+        return [dict(doc) for doc in docs]
+
+    def count(self, query):
+        self._expire()
+        key = _query_key(query)
+        with self._lock:
+            if key in self._counts:
+                return self._counts[key]
+        total = count_applications(query)
+        with self._lock:
+            self._counts[key] = total
+            self._query_fields[key] = query_fields(query)
+        return total
+
+    def company_names(self):
+        self._expire()
+        if self._company_names is None:
+            self._company_names = get_company_names()
+        return list(self._company_names)
+
+    def metrics(self):
+        self._expire()
+        if self._metrics is None:
+            self._metrics = get_application_metrics()
+        return dict(self._metrics)
+
+    # -- Writes --------------------------------------------------------------
+
+    def update_status(self, doc_id, new_status):
+        self.apply_update(doc_id, update_application_status(doc_id, new_status))
+
+    def toggle(self, doc_id, field, value):
+        update_application_toggle(doc_id, field, value)
+        self.apply_update(doc_id, {field: value})
+
+    def delete(self, doc_id):
+        delete_application(doc_id)
+        if self._watcher is not None:
+            self._deleted.add(doc_id)
+        self.apply_delete(doc_id)
+
+    def bulk_write(self, changes=None, delete_ids=()):
+        """Apply grid edits and deletes in one bulk_write. Returns the deleted ids."""
+        updates, deleted = bulk_write_applications(changes, delete_ids)
+        for doc_id, fields in updates.items():
+            self.apply_update(doc_id, fields)
+        if self._watcher is not None:
+            self._deleted.update(deleted)
+        for doc_id in deleted:
+            self.apply_delete(doc_id)
+        return deleted
+
+    # -- Cache maintenance ---------------------------------------------------
+
+    def _prune_query_fields(self):
+        """Forget the fields of queries left with no cached page or count. Call with the lock held."""
+        live = {key[0] for key in self._pages} | set(self._counts)
+        for query_key in list(self._query_fields):
+            if query_key not in live:
+                del self._query_fields[query_key]
+
+    def apply_update(self, doc_id, fields):
+        """Reflect `fields` having been $set on one application."""
+        changed = set(fields)
+        with self._lock:
+            for key in list(self._pages):
+                query_key, sort_key = key[0], key[1]
+                sort_fields = {field for field, _ in SORT_SPECS[sort_key]}
+                if changed & (self._query_fields.get(query_key, set()) | sort_fields):
+                    # Membership or order of this query may have changed
+                    del self._pages[key]
+                    continue
+                for doc in self._pages[key]:
+                    if doc["_id"] == doc_id:
+                        doc.update(fields)
+            for query_key in list(self._counts):
+                if changed & self._query_fields.get(query_key, set()):
+                    del self._counts[query_key]
+            self._prune_query_fields()
+            self._metrics = None
+
+    def apply_delete(self, doc_id):
+        """Reflect one application having been deleted."""
+        with self._lock:
+            groups = {}
+            for key, docs in self._pages.items():
+                groups.setdefault(key[:2] + (key[3],), []).append((key[2], key, docs))
+            for (_, _, page_size), pages in groups.items():
+                holding = [page for page, _, docs in pages if any(doc["_id"] == doc_id for doc in docs)]
+                # Every page after the one that held the document shifts up by
+                # one; if no cached page held it, it was on an uncached one
+                first_stale = min(holding) if holding else -1
+                for page, key, docs in pages:
+                    if page > first_stale:
+                        del self._pages[key]
+                    elif page == first_stale:
+                        remaining = [doc for doc in docs if doc["_id"] != doc_id]
+                        if len(docs) < page_size:
+                            # Last page: nothing moves in to fill the gap
+                            self._pages[key] = remaining
+                        else:
+                            del self._pages[key]
+            self._counts.clear()
+            self._prune_query_fields()
+            self._company_names = None
+            self._metrics = None
+
+    def apply_insert(self):
+        """Reflect a new application having been inserted."""
+        with self._lock:
+            self._pages.clear()
+            self._counts.clear()
+            self._query_fields.clear()
+            self._company_names = None
+            self._metrics = None
+
+    def clear(self):
+        self.apply_insert()
+
+    # -- Writes from other processes -------------------------------------------
+
+    def start_change_stream(self):
+        """
+        Follow the collection's change stream in a background thread and apply
+        each insert/update/delete to the cache. Needs a replica set (e.g. Atlas).
+        """
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name="application-change-stream", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        try:
+            with get_applications_collection().watch() as stream:
+                logging.info("Following the applications change stream.")
+                for change in stream:
+                    operation = change.get("operationType")
+                    if operation == "update":
+                        description = change["updateDescription"]
+                        fields = dict(description.get("updatedFields", {}))
+                        fields.update(dict.fromkeys(description.get("removedFields", [])))
+                        self.apply_update(change["documentKey"]["_id"], fields)
+                    elif operation == "delete":
+                        doc_id = change["documentKey"]["_id"]
+                        if doc_id in self._deleted:
+                            self._deleted.discard(doc_id)
+                        else:
+                            self.apply_delete(doc_id)
+                    elif operation in ("insert", "replace"):
+                        self.apply_insert()
+                    else:
+                        self.clear()
+        except Exception:
+            logging.exception("Applications change stream stopped; falling back to the cache TTL.")
+        with self._lock:
+            self._watcher = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_application_store():
+    """Return the process-wide ApplicationStore, starting its change stream if enabled."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ApplicationStore()
+                if st.secrets.get("TRACKER_CHANGE_STREAM", False):
+                    _store.start_change_stream()
+    return _store
@@ -0,0 +1,211 @@
+"""
+Maintenance commands for the applications collection.
+
+Run from the project root so st.secrets can find .streamlit/secrets.toml:
+
+    python -m db.maintenance ensure-indexes
+    python -m db.maintenance migrate-dates --batch-size 500
+    python -m db.maintenance repair-stats
+    python -m db.maintenance rebuild-tfidf
+    python -m db.maintenance rebuild-duplicates
+    python -m db.maintenance backfill-scores --batch-size 500 --workers 4
+    python -m db.maintenance compact-storage --batch-size 200
+"""
+import argparse
+import logging
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from db.mongodb_client import close_mongo_client
+from db.operations import (
+    CASE_INSENSITIVE_COLLATION,
+    TEXT_INDEX_WEIGHTS,
+    get_applications_collection,
+    repair_application_stats,
+    store_base_resume,
+)
+from db.storage import encode_content, resume_version
+from utils.minhash import signature_to_bytes
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+LEGACY_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# One index per db.operations.SORT_SPECS entry (relevance uses the text index).
+# They share the query collation, otherwise MongoDB cannot use them for the
+# case-insensitive sorts.
+APPLICATION_INDEXES = [
+    ("date_desc_idx", [("date_applied", DESCENDING), ("company_name", ASCENDING),
+                       ("title", ASCENDING), ("_id", ASCENDING)]),
+    ("date_asc_idx", [("date_applied", ASCENDING), ("company_name", ASCENDING),
+                      ("title", ASCENDING), ("_id", ASCENDING)]),
+    ("company_date_idx", [("company_name", ASCENDING), ("date_applied", ASCENDING),
+                          ("_id", ASCENDING)]),
+    ("status_idx", [("primary_status", ASCENDING), ("_id", ASCENDING)]),
+    ("match_score_idx", [("matching_score", DESCENDING), ("_id", ASCENDING)]),
+]
+
+
+# Backs the tracker search and the "relevance" sort. Text indexes cannot take a collation.
+SEARCH_INDEX_NAME = "search_text_idx"
+# The search also matches company/title prefixes in an $or with $text, which
+# MongoDB only allows when every other clause has an index it can use; these
+# use the default collation, as the $text query does.
+SEARCH_PREFIX_INDEXES = [
+    ("company_name_search_idx", [("company_name", ASCENDING)]),
+    ("title_search_idx", [("title", ASCENDING)]),
+]
+
+
+def ensure_indexes():
+    """Create the compound indexes backing the tracker's sorts and its text search. Idempotent."""
+    collection = get_applications_collection()
+    for name, keys in APPLICATION_INDEXES:
+        collection.create_index(keys, name=name, collation=CASE_INSENSITIVE_COLLATION)
+        logging.info("Ensured index %s on %s", name, keys)
+    for name, keys in SEARCH_PREFIX_INDEXES:
+        collection.create_index(keys, name=name)
+        logging.info("Ensured index %s on %s", name, keys)
+    existing = collection.index_information().get(SEARCH_INDEX_NAME)
+    if existing is not None and existing.get("weights") != TEXT_INDEX_WEIGHTS:
+        # A collection has one text index; replace it when its fields or weights changed
+        collection.drop_index(SEARCH_INDEX_NAME)
+        logging.info("Dropped outdated text index %s", SEARCH_INDEX_NAME)
+    collection.create_index([(field, TEXT) for field in TEXT_INDEX_WEIGHTS], name=SEARCH_INDEX_NAME,
+                            weights=TEXT_INDEX_WEIGHTS, default_language="english")
+    logging.info("Ensured text index %s on %s", SEARCH_INDEX_NAME, list(TEXT_INDEX_WEIGHTS))
+
+
+def parse_legacy_date(value):
+    """Convert a legacy "%Y-%m-%d %H:%M:%S" string to a datetime, or None."""
+    if not value or value.startswith("0000"):
+        return None
+    try:
+        return datetime.strptime(value, LEGACY_DATE_FORMAT)
+    except ValueError:
+        logging.warning("Unparseable date_applied %r, storing null.", value)
+        return None
+
+
+def migrate_dates(batch_size=500):
+    """
+    Convert string date_applied values to BSON datetimes (or null) in chunks
+    of `batch_size` with bulk_write. Migrated documents no longer match the
+    $type filter, so an interrupted run simply resumes where it stopped.
+    """
+    collection = get_applications_collection()
+    query = {"date_applied": {"$type": "string"}}
+    migrated = 0
+    last_id = None
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(batch_query, {"date_applied": 1})
+                     .sort("_id", ASCENDING)
+                     .limit(batch_size))
+        if not batch:
+            break
+        ops = [
+            UpdateOne({"_id": doc["_id"], "date_applied": doc["date_applied"]},
+                      {"$set": {"date_applied": parse_legacy_date(doc["date_applied"])}})
+            for doc in batch
+        ]
+        result = collection.bulk_write(ops, ordered=False)
+        migrated += result.modified_count
+        last_id = batch[-1]["_id"]
+        logging.info("Migrated %d documents so far (last _id %s).", migrated, last_id)
+    logging.info("date_applied migration finished: %d documents converted.", migrated)
+    return migrated
+
+
+def compact_storage(batch_size=200):
+    """
+    Rewrite applications that still hold a full resume_content copy in the
+    compact layout: a delta against the current base resume (lossless,
+    whichever base they were tailored from), compressed job descriptions and
+    packed MinHash signatures. Run ensure-indexes afterwards so the text
+    search covers jd_terms.
+    Rewritten documents no longer match, so an interrupted run just resumes.
+    """
+    from logic.prompt_assets import get_base_resume
+    base_resume = get_base_resume()
+    if not base_resume:
+        raise SystemExit("No base resume found (data/resume.json or the [resume] secret).")
+    store_base_resume(resume_version(base_resume), base_resume)
+    collection = get_applications_collection()
+    query = {"resume_content": {"$exists": True}}
+    compacted = 0
+    last_id = None
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(batch_query, {"resume_content": 1, "job_description": 1, "jd_signature": 1})
+                     .sort("_id", ASCENDING)
+                     .limit(batch_size))
+        if not batch:
+            break
+        ops = []
+        for doc in batch:
+            fields, _ = encode_content(doc["resume_content"], doc.get("job_description", ""), base_resume)
+            if isinstance(doc.get("jd_signature"), list):
+                fields["jd_signature"] = signature_to_bytes(doc["jd_signature"])
+            unset = {field: "" for field in ("resume_content", "job_description") if field not in fields}
+            update = {"$set": fields}
+            if unset:
+                update["$unset"] = unset
+            ops.append(UpdateOne({"_id": doc["_id"]}, update))
+        result = collection.bulk_write(ops, ordered=False)
+        compacted += result.modified_count
+        last_id = batch[-1]["_id"]
+        logging.info("Compacted %d documents so far (last _id %s).", compacted, last_id)
+    logging.info("Storage compaction finished: %d documents rewritten.", compacted)
+    return compacted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Applications collection maintenance.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ensure-indexes", help="Create the tracker sort indexes.")
+    migrate_parser = subparsers.add_parser(
+        "migrate-dates", help="Convert string date_applied values to datetimes.")
+    migrate_parser.add_argument("--batch-size", type=int, default=500)
+    subparsers.add_parser("repair-stats", help="Recompute the tracker metrics counters.")
+    subparsers.add_parser("rebuild-tfidf", help="Refit the job description TF-IDF index.")
+    subparsers.add_parser("rebuild-duplicates",
+                          help="Rebuild the near-duplicate job description index (and missing signatures).")
+    backfill_parser = subparsers.add_parser(
+        "backfill-scores", help="Compute matching_score for applications that lack one.")
+    backfill_parser.add_argument("--batch-size", type=int, default=500)
+    backfill_parser.add_argument("--workers", type=int, default=None)
+    backfill_parser.add_argument("--restart", action="store_true",
+                                 help="Ignore the saved checkpoint and start from the beginning.")
+    compact_parser = subparsers.add_parser(
+        "compact-storage", help="Store resumes as deltas and compress job descriptions.")
+    compact_parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "ensure-indexes":
+            ensure_indexes()
+        elif args.command == "migrate-dates":
+            migrate_dates(args.batch_size)
+        elif args.command == "repair-stats":
+            repair_application_stats()
+        elif args.command == "rebuild-tfidf":
+            from logic.matching import rebuild_tfidf_index
+            rebuild_tfidf_index()
+        elif args.command == "rebuild-duplicates":
+            from logic.duplicates import rebuild_duplicate_index
+            rebuild_duplicate_index()
+        elif args.command == "backfill-scores":
+            from logic.matching import backfill_matching_scores
+            backfill_matching_scores(args.batch_size, args.workers, restart=args.restart)
+        elif args.command == "compact-storage":
+            compact_storage(args.batch_size)
+    finally:
+        close_mongo_client()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,74 @@
+import atexit
+import threading
 import pymongo
 import streamlit as st
 import logging
 
+# One MongoClient per process. Module globals survive Streamlit reruns and are
+# shared by every session, so the connection pool and the TLS/server-discovery
+# handshake are paid once instead of on every database operation.
+_client = None
+_client_lock = threading.Lock()
+
+DEFAULT_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 0,
+    "maxIdleTimeMS": 300000,
+    "connectTimeoutMS": 10000,
+    "serverSelectionTimeoutMS": 10000,
+    "socketTimeoutMS": 30000,
+}
+
+# Optional st.secrets overrides for the pool size and timeout options above.
+SECRET_OPTION_KEYS = {
+    "MONGODB_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGODB_MIN_POOL_SIZE": "minPoolSize",
+    "MONGODB_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGODB_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGODB_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+    "MONGODB_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+}
+
+
+def get_client_options():
+    """
+    Returns the MongoClient keyword options, applying any overrides from st.secrets.
+    """
+    options = dict(DEFAULT_CLIENT_OPTIONS)
+    for secret_key, option in SECRET_OPTION_KEYS.items():
+        if secret_key in st.secrets:
+            options[option] = int(st.secrets[secret_key])
+    return options
+
+
 def get_mongo_client():
     """
-    Returns a pymongo.MongoClient instance using the connection string from st.secrets.
+    Returns the shared pymongo.MongoClient instance, creating it on first use
+    with the connection string from st.secrets.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            options = get_client_options()
+            logging.info("Attempting to create MongoDB client with options: %s", options)
+            _client = pymongo.MongoClient(st.secrets["MONGODB_URI"], **options)
+            logging.info("MongoDB client created successfully.")
+    return _client
+
+
+def close_mongo_client():
     """
-    logging.info("Attempting to create MongoDB client.")
-    client = pymongo.MongoClient(st.secrets["MONGODB_URI"])
-    logging.info("MongoDB client created successfully.")
-    return client
+    Closes the shared MongoClient, if one was created. The next call to
+    get_mongo_client() creates a fresh client.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            logging.info("Closing MongoDB client.")
+            _client.close()
+            _client = None
+
+
+atexit.register(close_mongo_client)
@@ -1,27 +1,130 @@
 import pymongo
 import streamlit as st
 from datetime import datetime
+import functools
 import logging
+import re
+import time
 from db.mongodb_client import get_mongo_client
+from db.storage import encode_content, expand_content
+from utils.minhash import minhash_signature, signature_to_bytes
+
+def log_latency(func):
+    """
+    Decorator that logs how long a database operation took, in milliseconds.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logging.info("DB operation %s took %.1f ms", func.__name__, elapsed_ms)
+    return wrapper
 
 def get_applications_collection():
-    logging.info("Fetching applications collection.")
     client = get_mongo_client()
     db = client[st.secrets["DATABASE_NAME"]]
-    collection = db[st.secrets["COLLECTION_NAME"]]
-    logging.info("Applications collection retrieved.")
-    return collection
+    return db[st.secrets["COLLECTION_NAME"]]
+
+def get_base_resumes_collection():
+    client = get_mongo_client()
+    db = client[st.secrets["DATABASE_NAME"]]
+    return db[st.secrets.get("BASE_RESUMES_COLLECTION_NAME", "base_resumes")]
+
+def get_stats_collection():
+    client = get_mongo_client()
+    db = client[st.secrets["DATABASE_NAME"]]
+    return db[st.secrets.get("STATS_COLLECTION_NAME", "application_stats")]
+
+# Single document holding the tracker's metrics counters. Writes keep it current
+# with $inc; repair_application_stats() rebuilds it from the collection.
+STATS_DOC_ID = "applications"
+STAT_FIELDS = ("total", "applied", "interview", "rejected", "selected",
+               "cold_email_sent", "linkedin_sent")
+# Application fields the counters depend on
+STATS_SOURCE_PROJECTION = {"primary_status": 1, "secondary_status": 1,
+                           "sent_cold_email": 1, "sent_linkedin_message": 1}
+
+def stat_contributions(doc):
+    """Return how much a single application adds to each counter."""
+    if doc is None:
+        return dict.fromkeys(STAT_FIELDS, 0)
+    secondary = doc.get("secondary_status", "")
+    return {
+        "total": 1,
+        "applied": int(doc.get("primary_status") == "applied"),
+        "interview": int(secondary == "interview"),
+        "rejected": int(secondary == "rejected"),
+        "selected": int(secondary == "selected"),
+        "cold_email_sent": int(doc.get("sent_cold_email") is True),
+        "linkedin_sent": int(doc.get("sent_linkedin_message") is True),
+    }
+
+def apply_stats_delta(before, after):
+    """
+    $inc the stats document by the counter difference between two versions of
+    an application (None means the application did not exist). Skipped while
+    the stats document is missing; the next read rebuilds it.
+    """
+    delta = stats_delta(before, after)
+    if delta:
+        get_stats_collection().update_one({"_id": STATS_DOC_ID}, {"$inc": delta})
+
+def stats_delta(before, after, delta=None):
+    """
+    Counter difference between two versions of an application, added into
+    `delta` when given (to sum several changes into one $inc).
+    """
+    old = stat_contributions(before)
+    new = stat_contributions(after)
+    delta = {} if delta is None else delta
+    for field in STAT_FIELDS:
+        if new[field] != old[field]:
+            delta[field] = delta.get(field, 0) + new[field] - old[field]
+    return {field: value for field, value in delta.items() if value}
+
+# Base resume versions known to be stored, so inserts upsert each one only once
+_stored_base_versions = set()
 
-def insert_application(company, title, job_id, resume_content, job_description, sanitized_filename, status="not applied", matching_score=None):
+def store_base_resume(version, resume):
+    """Store a base resume under its version (content hash) unless it is already stored."""
+    if version in _stored_base_versions:
+        return
+    get_base_resumes_collection().update_one(
+        {"_id": version}, {"$setOnInsert": {"resume": resume, "created_at": datetime.now()}}, upsert=True)
+    _stored_base_versions.add(version)
+
+@functools.lru_cache(maxsize=8)
+def get_base_resume_version(version):
+    """A stored base resume by version, or None. Versions never change once stored."""
+    doc = get_base_resumes_collection().find_one({"_id": version})
+    return doc["resume"] if doc else None
+
+def expand_application(doc):
+    """Rebuild resume_content and job_description of a document read from the collection."""
+    return expand_content(doc, get_base_resume_version)
+
+@log_latency
+def insert_application(company, title, job_id, resume_content, job_description, sanitized_filename, status="not applied", matching_score=None, jd_signature=None, base_resume=None):
+    """
+    Insert a new application. jd_signature is the job description's MinHash
+    signature (computed here when not given), used for near-duplicate lookups.
+    With the base_resume it was tailored from, the resume is stored as a delta
+    against it and long job descriptions are compressed (see db/storage.py).
+    """
     logging.info(
         "Inserting application for company: %s, title: %s", company, title)
     collection = get_applications_collection()
+    content, base_version = encode_content(resume_content, job_description, base_resume)
+    if base_version is not None:
+        store_base_resume(base_version, base_resume)
     doc = {
         "company_name": company,
         "title": title,
         "job_id": job_id,
-        "resume_content": resume_content,
-        "job_description": job_description,
+        **content,
         "primary_status": status,
         "secondary_status": "",
         "file_name": sanitized_filename,
@@ -31,77 +134,350 @@ def insert_application(company, title, job_id, resume_content, job_description,
     }
     if matching_score is not None:
         doc["matching_score"] = matching_score
+    if jd_signature is None:
+        jd_signature = minhash_signature(job_description)
+    doc["jd_signature"] = signature_to_bytes(jd_signature)
     if status == "applied":
-        doc["date_applied"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        doc["date_applied"] = datetime.now()
     else:
-        doc["date_applied"] = ""
+        doc["date_applied"] = None
     result = collection.insert_one(doc)
+    apply_stats_delta(None, doc)
     logging.info("Application inserted with ID: %s", result.inserted_id)
     return result.inserted_id
 
-def update_application_status(doc_id, new_status):
-    logging.info("Updating application ID %s with new status %s",
-                 doc_id, new_status)
-    collection = get_applications_collection()
+def status_update_fields(new_status):
+    """Fields to $set for a status picked in the UI (interview/rejected/selected imply applied)."""
     update_fields = {}
     if new_status == "not applied":
         update_fields["primary_status"] = "not applied"
         update_fields["secondary_status"] = ""
-        update_fields["date_applied"] = ""
+        update_fields["date_applied"] = None
     elif new_status == "applied":
         update_fields["primary_status"] = "applied"
         update_fields["secondary_status"] = ""
-        update_fields["date_applied"] = datetime.now().strftime(
-            "%Y-%m-%d %H:%M:%S")
+        update_fields["date_applied"] = datetime.now()
     elif new_status in ["interview", "rejected", "selected"]:
         update_fields["primary_status"] = "applied"
         update_fields["secondary_status"] = new_status
     else:
         update_fields["status"] = new_status
-    collection.update_one({"_id": doc_id}, {"$set": update_fields})
+    return update_fields
+
+@log_latency
+def update_application_status(doc_id, new_status):
+    """Set an application's status fields. Returns the fields that were $set."""
+    logging.info("Updating application ID %s with new status %s",
+                 doc_id, new_status)
+    collection = get_applications_collection()
+    update_fields = status_update_fields(new_status)
+    before = collection.find_one_and_update(
+        {"_id": doc_id}, {"$set": update_fields},
+        projection=STATS_SOURCE_PROJECTION,
+        return_document=pymongo.ReturnDocument.BEFORE)
+    if before is not None:
+        apply_stats_delta(before, {**before, **update_fields})
     logging.info("Application status updated with fields: %s", update_fields)
+    return update_fields
 
+@log_latency
 def update_application_toggle(doc_id, field, value):
     logging.info("Updating application %s: setting %s to %s",
                  doc_id, field, value)
     collection = get_applications_collection()
-    collection.update_one({"_id": doc_id}, {"$set": {field: value}})
+    before = collection.find_one_and_update(
+        {"_id": doc_id}, {"$set": {field: value}},
+        projection=STATS_SOURCE_PROJECTION,
+        return_document=pymongo.ReturnDocument.BEFORE)
+    if before is not None:
+        apply_stats_delta(before, {**before, field: value})
     logging.info("Application toggle updated.")
 
+@log_latency
 def get_all_applications():
     logging.info("Retrieving all applications (unpaginated).")
     collection = get_applications_collection()
-    apps = list(collection.find({}))
+    apps = [expand_application(doc) for doc in collection.find({})]
     logging.info("Retrieved %d applications.", len(apps))
     return apps
 
+@log_latency
 def delete_application(doc_id):
     logging.info("Deleting application with ID: %s", doc_id)
     collection = get_applications_collection()
-    collection.delete_one({"_id": doc_id})
+    deleted = collection.find_one_and_delete({"_id": doc_id}, projection=STATS_SOURCE_PROJECTION)
+    if deleted is not None:
+        apply_stats_delta(deleted, None)
+    get_application_details.cache_clear()
     logging.info("Application deleted.")
 
-
-# Example: Server-side pagination if needed
-def get_applications_paginated(page=0, page_size=10):
+@log_latency
+def bulk_write_applications(changes=None, delete_ids=()):
     """
-    Retrieve a slice of applications from the DB with skip/limit.
-    Sort by date_applied descending if it is stored as a datetime or
-    a consistent format. Adjust as needed.
+    Apply many edits and deletes in one bulk_write. `changes` maps an
+    application id to {"status": ..., "favorite": ..., "sent_cold_email": ...,
+    "sent_linkedin_message": ...} (any subset). The stats document gets one
+    summed $inc. Returns ({doc_id: fields $set}, [deleted ids]).
     """
-    logging.info("Retrieving paginated applications: page=%s, page_size=%s", page, page_size)
+    changes = changes or {}
+    delete_ids = list(delete_ids)
+    updates = {}
+    for doc_id, change in changes.items():
+        if doc_id in delete_ids:
+            continue
+        fields = {field: value for field, value in change.items() if field != "status"}
+        if "status" in change:
+            fields.update(status_update_fields(change["status"]))
+        if fields:
+            updates[doc_id] = fields
+    if not updates and not delete_ids:
+        return {}, []
+    logging.info("Bulk writing %d application updates and %d deletes", len(updates), len(delete_ids))
     collection = get_applications_collection()
+    # The counters need the current values; bulk_write cannot return them
+    before = {doc["_id"]: doc for doc in collection.find(
+        {"_id": {"$in": list(updates) + delete_ids}}, STATS_SOURCE_PROJECTION)}
+    ops = [pymongo.UpdateOne({"_id": doc_id}, {"$set": fields}) for doc_id, fields in updates.items()]
+    ops += [pymongo.DeleteOne({"_id": doc_id}) for doc_id in delete_ids]
+    result = collection.bulk_write(ops, ordered=False)
+    delta = {}
+    for doc_id, fields in updates.items():
+        if doc_id in before:
+            delta = stats_delta(before[doc_id], {**before[doc_id], **fields}, delta)
+    deleted = [doc_id for doc_id in delete_ids if doc_id in before]
+    for doc_id in deleted:
+        delta = stats_delta(before[doc_id], None, delta)
+    if delta:
+        get_stats_collection().update_one({"_id": STATS_DOC_ID}, {"$inc": delta})
+    if deleted:
+        get_application_details.cache_clear()
+    logging.info("Bulk write modified %d and deleted %d applications.",
+                 result.modified_count, result.deleted_count)
+    return updates, deleted
+
+
+# Fields the tracker's list view needs. The resume and job description are
+# left out and loaded on demand with get_application_details().
+SUMMARY_PROJECTION = {
+    "company_name": 1,
+    "title": 1,
+    "job_id": 1,
+    "date_applied": 1,
+    "status": 1,
+    "primary_status": 1,
+    "secondary_status": 1,
+    "file_name": 1,
+    "favorite": 1,
+    "sent_cold_email": 1,
+    "sent_linkedin_message": 1,
+    "matching_score": 1,
+}
+
+# Both storage layouts: full copies (older documents) or delta + compressed text
+DETAIL_PROJECTION = {"resume_content": 1, "job_description": 1,
+                     "resume_base": 1, "resume_delta": 1, "jd_compressed": 1}
 
-    # If date_applied is stored as string "YYYY-MM-DD HH:MM:SS", you can sort by it as text
-    # but it's safer to store date_applied as a proper datetime field for correct sorting.
-    # For demonstration, we do .sort("date_applied", -1) on the string field:
-    skip_count = page * page_size
-    cursor = (collection
-              .find({})
-              .sort("date_applied", -1)
-              .skip(skip_count)
+# Case-insensitive ordering for company/title sorts, matching what the tracker
+# used to do with .lower() in Python.
+CASE_INSENSITIVE_COLLATION = {"locale": "en", "strength": 2}
+
+# Sort specs for the tracker's "Sort by" options. Every spec ends with _id so
+# paging over ties is stable, and each one has a matching index in
+# db/maintenance.py. date_applied is a BSON datetime (null when not applied).
+SORT_SPECS = {
+    "date_desc": [("date_applied", pymongo.DESCENDING), ("company_name", pymongo.ASCENDING),
+                  ("title", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+    "date_asc": [("date_applied", pymongo.ASCENDING), ("company_name", pymongo.ASCENDING),
+                 ("title", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+    "company": [("company_name", pymongo.ASCENDING), ("date_applied", pymongo.ASCENDING),
+                ("_id", pymongo.ASCENDING)],
+    "status": [("primary_status", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+    "match_desc": [("matching_score", pymongo.DESCENDING), ("_id", pymongo.ASCENDING)],
+    # Only meaningful with a search; falls back to date_desc otherwise
+    "relevance": [("search_score", {"$meta": "textScore"}), ("_id", pymongo.ASCENDING)],
+}
+
+# Weighted text index used by the tracker search (created in db/maintenance.py).
+# A company or title hit outranks any number of job description hits.
+# Compressed job descriptions are searched through their jd_terms.
+TEXT_INDEX_WEIGHTS = {"company_name": 10, "title": 5, "job_description": 1, "jd_terms": 1}
+
+def uses_text_search(query):
+    """True if a query built by build_applications_query() contains a $text search."""
+    if isinstance(query, dict):
+        return "$text" in query or any(uses_text_search(value) for value in query.values())
+    if isinstance(query, list):
+        return any(uses_text_search(clause) for clause in query)
+    return False
+
+def build_search_clause(search):
+    """
+    Filter for the tracker search box. Every word must appear (each one is
+    sent to $text as a quoted phrase), ranked over company, title and job
+    description; company names and titles also match on a case-insensitive
+    prefix, so partial input like "goo" or "Micro" still finds Google or
+    Microsoft. $text under $or needs the other clauses indexed too (see
+    db/maintenance.py).
+    """
+    terms = search.replace('"', " ").split()
+    prefix = {"$regex": "^" + re.escape(search.strip()), "$options": "i"}
+    return {"$or": [
+        {"$text": {"$search": " ".join(f'"{term}"' for term in terms)}},
+        {"company_name": prefix},
+        {"title": prefix},
+    ]}
+
+def effective_sort_key(query, sort_key):
+    """The SORT_SPECS key a page of `query` is really sorted by: relevance needs a text search."""
+    if sort_key == "relevance" and not uses_text_search(query):
+        return "date_desc"
+    return sort_key
+
+def build_applications_query(status=None, companies=None, search="", favorite_only=False,
+                             no_cold_email=False, no_linkedin=False):
+    """
+    Build a single MongoDB filter document from the tracker's sidebar filters.
+    Boolean flags use $ne True so documents missing the field still match.
+    """
+    clauses = []
+    if status:
+        status_clauses = [
+            {"primary_status": {"$in": list(status)}},
+            {"secondary_status": {"$in": list(status)}},
+        ]
+        if "not applied" in status:
+            # Documents without primary_status have always been shown as "not applied"
+            status_clauses.append({"primary_status": {"$exists": False}})
+        clauses.append({"$or": status_clauses})
+    if companies:
+        clauses.append({"company_name": {"$in": list(companies)}})
+    if search and search.replace('"', " ").strip():
+        clauses.append(build_search_clause(search))
+    if favorite_only:
+        clauses.append({"favorite": True})
+    if no_cold_email:
+        clauses.append({"sent_cold_email": {"$ne": True}})
+    if no_linkedin:
+        clauses.append({"sent_linkedin_message": {"$ne": True}})
+
+    if not clauses:
+        return {}
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+@log_latency
+def get_applications_paginated(page=0, page_size=10, query=None, sort_key="date_desc"):
+    """
+    Retrieve one page of application summaries matching `query`, sorted
+    server-side with skip/limit. `sort_key` is one of SORT_SPECS.
+    Text searches also return each document's search_score.
+    """
+    sort_key = effective_sort_key(query, sort_key)
+    logging.info("Retrieving paginated applications: page=%s, page_size=%s, sort=%s",
+                 page, page_size, sort_key)
+    collection = get_applications_collection()
+    projection = SUMMARY_PROJECTION
+    if uses_text_search(query):
+        projection = {**SUMMARY_PROJECTION, "search_score": {"$meta": "textScore"}}
+    cursor = collection.find(query or {}, projection)
+    # Text indexes only support simple collation, so searches sort case-sensitively
+    if not uses_text_search(query):
+        cursor = cursor.collation(CASE_INSENSITIVE_COLLATION)
+    cursor = (cursor
+              .sort(SORT_SPECS[sort_key])
+              .skip(page * page_size)
               .limit(page_size)
              )
     apps = list(cursor)
     logging.info("Retrieved %d applications from page %d", len(apps), page)
-    return apps
\ No newline at end of file
+    return apps
+
+@log_latency
+def get_application_ids(query=None):
+    """The _id of every application matching `query`, for orderings computed outside MongoDB."""
+    collection = get_applications_collection()
+    cursor = collection.find(query or {}, {"_id": 1})
+    if not uses_text_search(query):
+        cursor = cursor.collation(CASE_INSENSITIVE_COLLATION)
+    return [doc["_id"] for doc in cursor]
+
+@log_latency
+def get_applications_by_ids(ids):
+    """Application summaries for `ids`, in the order given."""
+    collection = get_applications_collection()
+    docs = {doc["_id"]: doc for doc in collection.find({"_id": {"$in": list(ids)}}, SUMMARY_PROJECTION)}
+    return [docs[doc_id] for doc_id in ids if doc_id in docs]
+
+@functools.lru_cache(maxsize=32)
+@log_latency
+def get_application_details(doc_id):
+    """
+    Fetch the heavy fields (resume_content, job_description) of one
+    application. Results are kept in a small LRU cache since these fields
+    never change after insert.
+    """
+    logging.info("Fetching details for application ID: %s", doc_id)
+    collection = get_applications_collection()
+    doc = collection.find_one({"_id": doc_id}, DETAIL_PROJECTION)
+    return expand_application(doc) if doc else {}
+
+@log_latency
+def count_applications(query=None):
+    """Count the applications matching `query`."""
+    collection = get_applications_collection()
+    if uses_text_search(query):
+        # $text queries reject a collation
+        return collection.count_documents(query)
+    return collection.count_documents(query or {}, collation=CASE_INSENSITIVE_COLLATION)
+
+@log_latency
+def get_company_names():
+    """Return the sorted list of distinct company names."""
+    collection = get_applications_collection()
+    return sorted(name for name in collection.distinct("company_name") if name)
+
+@log_latency
+def repair_application_stats():
+    """
+    Recompute the stats document from scratch with one aggregation and
+    replace the stored counters. Returns the new counters.
+    """
+    collection = get_applications_collection()
+    pipeline = [{"$group": {
+        "_id": None,
+        "total": {"$sum": 1},
+        "applied": {"$sum": {"$cond": [{"$eq": ["$primary_status", "applied"]}, 1, 0]}},
+        "interview": {"$sum": {"$cond": [{"$eq": ["$secondary_status", "interview"]}, 1, 0]}},
+        "rejected": {"$sum": {"$cond": [{"$eq": ["$secondary_status", "rejected"]}, 1, 0]}},
+        "selected": {"$sum": {"$cond": [{"$eq": ["$secondary_status", "selected"]}, 1, 0]}},
+        "cold_email_sent": {"$sum": {"$cond": [{"$eq": ["$sent_cold_email", True]}, 1, 0]}},
+        "linkedin_sent": {"$sum": {"$cond": [{"$eq": ["$sent_linkedin_message", True]}, 1, 0]}},
+    }}]
+    result = next(collection.aggregate(pipeline), None) or {}
+    counters = {field: result.get(field, 0) for field in STAT_FIELDS}
+    get_stats_collection().replace_one({"_id": STATS_DOC_ID}, counters, upsert=True)
+    logging.info("Application stats rebuilt: %s", counters)
+    return counters
+
+@log_latency
+def get_application_metrics():
+    """
+    Return the counts shown in the tracker's metrics strip from the stats
+    document, rebuilding it first if it does not exist yet.
+    """
+    stats = get_stats_collection().find_one({"_id": STATS_DOC_ID})
+    if stats is None:
+        stats = repair_application_stats()
+    total = stats.get("total", 0)
+    applied = stats.get("applied", 0)
+    return {
+        "total": total,
+        "applied": applied,
+        "not applied": total - applied,
+        "interview": stats.get("interview", 0),
+        "rejected": stats.get("rejected", 0),
+        "selected": stats.get("selected", 0),
+        "no_cold_email": total - stats.get("cold_email_sent", 0),
+        "no_linkedin": total - stats.get("linkedin_sent", 0),
+    }
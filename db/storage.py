@@ -0,0 +1,184 @@
+"""
+Compact storage format for the heavy fields of an application.
+
+Instead of a full copy of the tailored resume, an application stores the
+version of the base resume it was tailored from (`resume_base`, a content
+hash; base resumes are stored once in their own collection) and a delta of
+what tailoring changed (`resume_delta`). The delta is zlib-compressed with
+the base resume as preset dictionary, so a rewritten bullet that keeps most
+of the original wording costs little more than its new words. Long job
+descriptions are stored zlib-compressed (`jd_compressed`) next to
+`jd_terms`, their distinct non-stopword terms, which the text index
+searches instead of the raw text.
+
+Documents written before this format keep `resume_content` and
+`job_description`; expand_content() reads both layouts.
+
+A delta node is one of:
+    {"=": value}                                  replace with value
+    {"d": {key: node}, "x": [keys], "o": [keys]}  patch a dict: changed keys,
+                                                  removed keys, key order if changed
+    {"l": {"index": node}, "n": length}           patch a list item by item
+"""
+import copy
+import hashlib
+import json
+import zlib
+from utils.normalization import get_stop_words, tokenize
+
+# Job descriptions shorter than this are stored as plain text
+COMPRESS_MIN_CHARS = 512
+COMPRESSION_LEVEL = 9
+
+
+def resume_version(resume):
+    """Content hash identifying a base resume."""
+    canonical = json.dumps(resume, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _size(value):
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def _same(old, new):
+    """Equality that also compares dict key order (== on dicts ignores it)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        return list(old) == list(new) and all(_same(old[key], new[key]) for key in old)
+    if isinstance(old, list) and isinstance(new, list):
+        return len(old) == len(new) and all(_same(a, b) for a, b in zip(old, new))
+    return type(old) is type(new) and old == new
+
+
+def _diff(old, new):
+    if isinstance(old, dict) and isinstance(new, dict):
+        node = {}
+        changed = {key: _diff(old[key], value) if key in old else {"=": value}
+                   for key, value in new.items() if key not in old or not _same(old[key], value)}
+        removed = [key for key in old if key not in new]
+        if changed:
+            node["d"] = changed
+        if removed:
+            node["x"] = removed
+        kept = [key for key in old if key in new]
+        if list(new) != kept + [key for key in new if key not in old]:
+            node["o"] = list(new)
+    elif isinstance(old, list) and isinstance(new, list):
+        node = {"n": len(new), "l": {
+            str(index): _diff(old[index], value) if index < len(old) else {"=": value}
+            for index, value in enumerate(new) if index >= len(old) or not _same(old[index], value)}}
+    else:
+        return {"=": new}
+    # A patch touching most of the value is no smaller than the value itself
+    return node if _size(node) < _size(new) else {"=": new}
+
+
+def _apply(value, node):
+    if "=" in node:
+        return copy.deepcopy(node["="])
+    if "n" in node:
+        items = value[:node["n"]] + [None] * (node["n"] - len(value))
+        for index, child in node["l"].items():
+            items[int(index)] = _apply(items[int(index)], child)
+        return items
+    for key in node.get("x", ()):
+        value.pop(key, None)
+    for key, child in node.get("d", {}).items():
+        value[key] = _apply(value.get(key), child)
+    if "o" in node:
+        value = {key: value[key] for key in node["o"]}
+    return value
+
+
+def diff_resume(base, resume):
+    """Delta turning `base` into `resume`, or None when they are equal."""
+    if _same(base, resume):
+        return None
+    return _diff(base, resume)
+
+
+def apply_resume_delta(base, delta):
+    """Rebuild a resume from its base and diff_resume() delta. `base` is not modified."""
+    resume = copy.deepcopy(base)
+    return resume if delta is None else _apply(resume, delta)
+
+
+def _compact_json(value):
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def compress_text(text, zdict=None):
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict) if zdict else zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+def decompress_text(data, zdict=None):
+    decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    return (decompressor.decompress(bytes(data)) + decompressor.flush()).decode("utf-8")
+
+
+def compress_delta(delta, base):
+    """A diff_resume() delta as compressed bytes (None stays None), with `base` as dictionary."""
+    if delta is None:
+        return None
+    return compress_text(_compact_json(delta).decode("utf-8"), zdict=_compact_json(base))
+
+
+def decompress_delta(data, base):
+    if data is None:
+        return None
+    return json.loads(decompress_text(data, zdict=_compact_json(base)))
+
+
+def search_terms(text):
+    """Distinct words of a text (stopwords dropped, as $text does), in order of first use."""
+    stop_words = get_stop_words()
+    return " ".join(dict.fromkeys(token for token in tokenize(text or "")
+                                  if len(token) > 1 and token not in stop_words))
+
+
+def encode_content(resume_content, job_description, base_resume=None):
+    """
+    Fields storing a tailored resume and its job description. Without a base
+    resume the resume is stored in full. Returns (fields, base_version).
+    """
+    fields = {}
+    base_version = None
+    if base_resume is not None and isinstance(resume_content, dict):
+        base_version = resume_version(base_resume)
+        fields["resume_base"] = base_version
+        fields["resume_delta"] = compress_delta(diff_resume(base_resume, resume_content), base_resume)
+    else:
+        fields["resume_content"] = resume_content
+    if job_description and len(job_description) >= COMPRESS_MIN_CHARS:
+        fields["jd_compressed"] = compress_text(job_description)
+        fields["jd_terms"] = search_terms(job_description)
+    else:
+        fields["job_description"] = job_description
+    return fields, base_version
+
+
+def stored_job_description(doc):
+    """The job description of a stored application, in either layout."""
+    if doc.get("jd_compressed") is not None:
+        return decompress_text(doc["jd_compressed"])
+    return doc.get("job_description", "")
+
+
+def expand_content(doc, get_base_resume):
+    """
+    Return a copy of a stored application with resume_content and
+    job_description rebuilt. `get_base_resume(version)` returns a stored base
+    resume (or None when it is missing, which gives an empty resume).
+    """
+    doc = dict(doc)
+    if "resume_base" in doc:
+        base = get_base_resume(doc.pop("resume_base"))
+        delta = doc.pop("resume_delta", None)
+        doc["resume_content"] = (apply_resume_delta(base, decompress_delta(delta, base))
+                                 if base is not None else None)
+    if "jd_compressed" in doc:
+        doc["job_description"] = stored_job_description(doc)
+        del doc["jd_compressed"]
+    doc.pop("jd_terms", None)
+    return doc
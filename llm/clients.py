@@ -0,0 +1,92 @@
+import asyncio
+import atexit
+import logging
+import threading
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Shared HTTP pool settings for every provider (httpx.Timeout / httpx.Limits kwargs).
+# httpx and the OpenAI SDK are only imported when the first client is built.
+HTTP_TIMEOUT = {"connect": 10.0, "read": 180.0, "write": 30.0, "pool": 30.0}
+HTTP_LIMITS = {"max_connections": 50, "max_keepalive_connections": 20, "keepalive_expiry": 120.0}
+MAX_RETRIES = 2
+
+# httpx connection pools are bound to the event loop that opened them, so all
+# LLM traffic runs on one long-lived loop in a background thread instead of a
+# fresh asyncio.run() loop per Streamlit rerun.
+_loop = None
+_http_client = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_event_loop():
+    """Return the shared background event loop, starting it on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+            logging.info("Started shared LLM event loop.")
+    return _loop
+
+
+def submit_async(coro):
+    """Schedule a coroutine on the shared event loop and return a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_async(coro, timeout=None):
+    """
+    Run a coroutine on the shared event loop and block until it finishes.
+    Use this instead of asyncio.run() for anything that calls an LLM client.
+    """
+    return submit_async(coro).result(timeout)
+
+
+def get_http_client():
+    """Return the keep-alive HTTP pool shared by all LLM clients."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            import httpx
+            _http_client = httpx.AsyncClient(timeout=httpx.Timeout(**HTTP_TIMEOUT),
+                                             limits=httpx.Limits(**HTTP_LIMITS))
+    return _http_client
+
+
+def get_async_client(api_key, base_url):
+    """Return the long-lived AsyncOpenAI client for `base_url`, creating it once."""
+    client = _clients.get(base_url)
+    if client is None:
+        http_client = get_http_client()
+        with _lock:
+            client = _clients.get(base_url)
+            if client is None:
+                from openai import AsyncOpenAI
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url,
+                                     http_client=http_client, max_retries=MAX_RETRIES)
+                _clients[base_url] = client
+                logging.info("Created AsyncOpenAI client for %s", base_url)
+    return client
+
+
+def close_llm_clients():
+    """Close the shared HTTP pool and stop the background event loop."""
+    global _loop, _http_client
+    with _lock:
+        loop, http_client = _loop, _http_client
+        _loop, _http_client = None, None
+        _clients.clear()
+    if loop is None:
+        return
+    if http_client is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(http_client.aclose(), loop).result(5)
+        except Exception:
+            logging.exception("Error closing LLM HTTP pool")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(close_llm_clients)
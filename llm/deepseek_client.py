@@ -1,5 +1,10 @@
 import logging
-import asyncio
+import time
+from llm.clients import run_async
+from llm.usage import record_usage
+
+DEEPSEEK_MODEL = "deepseek-chat"
+DEEPSEEK_PARAMS = {"temperature": 0.7, "max_tokens": 5000}
 
 # def call_deepseek_api(system_prompt, user_prompt, openai_client):
 #     messages = [
@@ -23,19 +28,23 @@ import asyncio
 #         logging.exception("Error calling Deepseek API")
 #         return ""
     
-def call_deepseek_api(system_prompt, user_prompt, openai_client):
+async def async_call_deepseek_api(system_prompt, user_prompt, openai_client):
+    """
+    Call DeepSeek through a long-lived AsyncOpenAI client. Returns "" on any error.
+    """
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
     logging.info("Calling Deepseek API with messages: %s", messages)
     try:
-        response = openai_client.chat.completions.create(
-            model="deepseek-chat",
+        start = time.perf_counter()
+        response = await openai_client.chat.completions.create(
+            model=DEEPSEEK_MODEL,
             messages=messages,
-            temperature=0.7,
-            max_tokens=5000,
+            **DEEPSEEK_PARAMS,
         )
+        record_usage("deepseek", DEEPSEEK_MODEL, response.usage, time.perf_counter() - start)
         logging.info("API call successful. Full response: %s", response)
         if not response.choices or not response.choices[0].message:
             logging.error("Empty or unexpected response structure received from API: %s", response)
@@ -47,6 +56,36 @@ def call_deepseek_api(system_prompt, user_prompt, openai_client):
         logging.exception("Error calling Deepseek API")
         return ""
 
-async def async_call_deepseek_api(system_prompt, user_prompt, openai_client):
-    logging.info("Asynchronously calling Deepseek API.")
-    return await asyncio.to_thread(call_deepseek_api, system_prompt, user_prompt, openai_client)
+def call_deepseek_api(system_prompt, user_prompt, openai_client):
+    return run_async(async_call_deepseek_api(system_prompt, user_prompt, openai_client))
+
+async def async_stream_deepseek_api(system_prompt, user_prompt, openai_client):
+    """
+    Stream a DeepSeek completion, yielding content deltas as they arrive.
+    Stops early (after logging) on any error, like async_call_deepseek_api.
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    logging.info("Streaming Deepseek API response.")
+    try:
+        start = time.perf_counter()
+        first_token = usage = None
+        stream = await openai_client.chat.completions.create(
+            model=DEEPSEEK_MODEL,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **DEEPSEEK_PARAMS,
+        )
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                yield chunk.choices[0].delta.content
+        record_usage("deepseek", DEEPSEEK_MODEL, usage, time.perf_counter() - start, first_token)
+    except Exception:
+        logging.exception("Error streaming Deepseek API")
@@ -1,7 +1,10 @@
-from openai import OpenAI
-import asyncio
 import logging
+import time
+from llm.clients import run_async
+from llm.usage import record_usage
 
+OPENAI_MODEL = "gpt-4o"
+OPENAI_PARAMS = {"temperature": 0.7, "max_completion_tokens": 5000}
 
 # def call_openai_api(messages):
 #     logging.info("Calling OpenAI API with messages: %s", messages)
@@ -16,20 +19,46 @@ import logging
 #     return result
 
 
-def call_openai_api(messages):
+async def async_call_openai_api(messages, openai_client):
+    """
+    Call OpenAI through a long-lived AsyncOpenAI client.
+    """
     logging.info("Calling OpenAI API with messages: %s", messages)
-    client = OpenAI()
-    completion = client.chat.completions.create(
-        model="gpt-4o",
+    start = time.perf_counter()
+    completion = await openai_client.chat.completions.create(
+        model=OPENAI_MODEL,
         messages=messages,
-        temperature=0.7,
-        max_completion_tokens=5000,
+        **OPENAI_PARAMS,
     )
+    record_usage("openai", OPENAI_MODEL, completion.usage, time.perf_counter() - start)
     result = completion.choices[0].message.content.strip()
     logging.info("OpenAI API response: %s", result)
     return result
 
 
-async def async_call_openai_api(messages):
-    logging.info("Asynchronously calling OpenAI API.")
-    return await asyncio.to_thread(call_openai_api, messages)
+def call_openai_api(messages, openai_client):
+    return run_async(async_call_openai_api(messages, openai_client))
+
+
+async def async_stream_openai_api(messages, openai_client):
+    """
+    Stream an OpenAI completion, yielding content deltas as they arrive.
+    """
+    logging.info("Streaming OpenAI API response.")
+    start = time.perf_counter()
+    first_token = usage = None
+    stream = await openai_client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        **OPENAI_PARAMS,
+    )
+    async for chunk in stream:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield chunk.choices[0].delta.content
+    record_usage("openai", OPENAI_MODEL, usage, time.perf_counter() - start, first_token)
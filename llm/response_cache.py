@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(provider, model, params, system_prompt, user_prompt):
+    """
+    Content-addressed key: SHA-256 over everything that determines the completion.
+    """
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "params": params,
+        "system": system_prompt,
+        "user": user_prompt,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of raw LLM responses with size- and age-based eviction.
+    A connection is opened per call so the cache is safe to share across
+    Streamlit session threads.
+    """
+
+    def __init__(self, path, max_entries=500, max_age_seconds=30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        """Return the cached response for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.max_age_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        logging.info("LLM cache %s for key %s (hits=%d, misses=%d)",
+                     "hit" if row else "miss", key[:12], self.hits, self.misses)
+        return row[0] if row else None
+
+    def set(self, key, response):
+        """Store a response and evict expired and least recently used entries."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN ("
+                " SELECT key FROM responses ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        """Return hit/miss counters for this process and the number of stored entries."""
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
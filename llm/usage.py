@@ -0,0 +1,104 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+# Most recent completions kept for the UI/summary; older ones are only in the logs
+RECENT_USAGE_SIZE = 200
+
+# Tag attached to every record made in the current context (e.g. a tailoring
+# job id); asyncio tasks inherit it, so all calls made for one job share it
+usage_tag = contextvars.ContextVar("usage_tag", default=None)
+
+_recent = deque(maxlen=RECENT_USAGE_SIZE)
+# (provider, seconds) of recent provider calls whatever their outcome, so
+# failed and cancelled calls count towards latency_percentile too
+_attempt_latencies = deque(maxlen=RECENT_USAGE_SIZE)
+_totals = {}
+_lock = threading.Lock()
+
+
+def _field(obj, name):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def normalize_usage(usage):
+    """
+    Token counts from a chat completion `usage` object as a plain dict.
+    cached_tokens is DeepSeek's prompt_cache_hit_tokens or OpenAI's
+    prompt_tokens_details.cached_tokens (0 when the provider reports neither).
+    """
+    prompt_tokens = _field(usage, "prompt_tokens") or 0
+    completion_tokens = _field(usage, "completion_tokens") or 0
+    cached_tokens = _field(usage, "prompt_cache_hit_tokens")
+    if cached_tokens is None:
+        cached_tokens = _field(_field(usage, "prompt_tokens_details"), "cached_tokens")
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens or 0,
+        "completion_tokens": completion_tokens,
+        "total_tokens": _field(usage, "total_tokens") or prompt_tokens + completion_tokens,
+    }
+
+
+def record_usage(provider, model, usage, latency_seconds, first_token_seconds=None):
+    """Log and keep the token usage and latency of one completion. Returns the normalized record."""
+    record = normalize_usage(usage)
+    record.update(provider=provider, model=model, latency_seconds=round(latency_seconds, 3),
+                  first_token_seconds=None if first_token_seconds is None else round(first_token_seconds, 3),
+                  timestamp=time.time(), tag=usage_tag.get())
+    with _lock:
+        _recent.append(record)
+        totals = _totals.setdefault(provider, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                                               "completion_tokens": 0, "latency_seconds": 0.0})
+        totals["requests"] += 1
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens", "latency_seconds"):
+            totals[key] += record[key]
+    logging.info("%s usage: %d prompt tokens (%d cached), %d completion tokens in %.2fs",
+                 provider, record["prompt_tokens"], record["cached_tokens"],
+                 record["completion_tokens"], latency_seconds)
+    return record
+
+
+def get_recent_usage(limit=None, tag=None):
+    """The most recent usage records (only those made under `tag`, if given), newest last."""
+    with _lock:
+        records = [record for record in _recent if tag is None or record["tag"] == tag]
+    return records[-limit:] if limit else records
+
+
+def record_attempt_latency(provider, latency_seconds):
+    """Keep the elapsed time of one call to `provider`, completed, failed or cancelled."""
+    with _lock:
+        _attempt_latencies.append((provider, latency_seconds))
+
+
+def latency_percentile(provider, percentile, min_samples=1):
+    """
+    The `percentile` (0-100) latency in seconds of `provider`'s recent calls,
+    or None with fewer than `min_samples` of them. Failed calls count with the
+    time they took and cancelled ones with the time they had run (a lower
+    bound), so slow calls that lost a hedge do not drop out of the sample.
+    """
+    with _lock:
+        latencies = sorted(seconds for name, seconds in _attempt_latencies if name == provider)
+    if len(latencies) < max(min_samples, 1):
+        return None
+    rank = min(len(latencies) - 1, max(0, round(percentile / 100 * len(latencies)) - 1))
+    return latencies[rank]
+
+
+def get_usage_summary():
+    """Per-provider totals since process start, with the share of prompt tokens served from cache."""
+    with _lock:
+        summary = {provider: dict(totals) for provider, totals in _totals.items()}
+    for totals in summary.values():
+        totals["cache_hit_ratio"] = (totals["cached_tokens"] / totals["prompt_tokens"]
+                                     if totals["prompt_tokens"] else 0.0)
+        totals["avg_latency_seconds"] = totals["latency_seconds"] / totals["requests"]
+    return summary
@@ -0,0 +1,159 @@
+"""
+Tailor many job descriptions in one run.
+
+    python -m logic.batch_tailor jobs.csv --provider deepseek --concurrency 5 --rpm 30
+
+The input is a CSV or JSONL file with the columns company, title, job_id,
+description, keywords and (optionally) instructions.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import time
+from llm.clients import run_async
+from logic.matching import insert_scored_application
+from logic.query_llm import process_resume
+from utils.helpers import format_keywords, sanitize_filename
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s - %(levelname)s - %(message)s")
+
+REQUIRED_COLUMNS = ("company", "title", "description", "keywords")
+
+# Default requests-per-minute ceiling for each provider
+PROVIDER_RATE_LIMITS = {"deepseek": 60, "openai": 30}
+
+
+class RateLimiter:
+    """Spaces out request starts so at most `requests_per_minute` begin per minute."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def parse_batch_rows(text, file_format):
+    """
+    Parse CSV or JSONL text into job rows. Rows missing a required column are
+    kept and reported as failures by tailor_batch().
+    """
+    if file_format == "jsonl":
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+    rows = [{key.strip().lower(): (value or "").strip() if isinstance(value, str) else value
+             for key, value in row.items() if key} for row in rows]
+    for row in rows:
+        # JSONL rows may give keywords as a list instead of a delimited string
+        if isinstance(row.get("keywords"), list):
+            row["keywords"] = ", ".join(str(keyword) for keyword in row["keywords"])
+    return rows
+
+
+def load_batch_file(path):
+    """Load job rows from a .csv or .jsonl file."""
+    file_format = "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_batch_rows(f.read(), file_format)
+
+
+async def tailor_row(index, row, api_choice, limiter, semaphore, use_cache):
+    """Tailor and store one job row, returning a per-row result dict."""
+    result = {"row": index, "company": row.get("company", ""), "title": row.get("title", ""),
+              "status": "failed", "application_id": None, "missing_keywords": [], "error": ""}
+    missing_columns = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+    if missing_columns:
+        result["error"] = f"Missing columns: {', '.join(missing_columns)}"
+        return result
+
+    async with semaphore:
+        await limiter.wait()
+        start = time.perf_counter()
+        try:
+            job_id = str(row.get("job_id", "") or "")
+            keywords = format_keywords(row["keywords"])
+            enhanced_resume, missing_keywords = await process_resume(
+                row["description"],
+                row.get("instructions", ""),
+                row["company"],
+                row["title"],
+                api_choice,
+                job_id,
+                keywords,
+                use_cache=use_cache,
+            )
+            if not enhanced_resume:
+                result["error"] = "LLM response could not be parsed"
+                return result
+            sanitized_name = sanitize_filename(row["company"], row["title"], job_id)
+            result["application_id"], result["matching_score"] = await asyncio.to_thread(
+                insert_scored_application, row["company"], row["title"], job_id,
+                enhanced_resume, row["description"], sanitized_name)
+            result["missing_keywords"] = missing_keywords
+            result["status"] = "ok"
+        except Exception as e:
+            logging.exception("Batch row %d failed", index)
+            result["error"] = str(e)
+        finally:
+            result["seconds"] = round(time.perf_counter() - start, 1)
+    return result
+
+
+async def tailor_batch(rows, api_choice="deepseek", concurrency=5, requests_per_minute=None,
+                       use_cache=True, on_result=None):
+    """
+    Tailor every row concurrently, with at most `concurrency` LLM calls in
+    flight and request starts limited per provider. `on_result` is called with
+    each row's result as soon as it finishes. Returns results in row order.
+    """
+    rpm = requests_per_minute or PROVIDER_RATE_LIMITS.get(api_choice, 30)
+    limiter = RateLimiter(rpm)
+    semaphore = asyncio.Semaphore(concurrency)
+    logging.info("Starting batch of %d jobs with %s (concurrency=%d, rpm=%d)",
+                 len(rows), api_choice, concurrency, rpm)
+
+    tasks = [asyncio.create_task(tailor_row(i, row, api_choice, limiter, semaphore, use_cache))
+             for i, row in enumerate(rows)]
+    results = []
+    for finished in asyncio.as_completed(tasks):
+        result = await finished
+        results.append(result)
+        logging.info("Batch row %d (%s - %s): %s %s", result["row"], result["company"],
+                     result["title"], result["status"], result["error"])
+        if on_result:
+            on_result(result)
+    return sorted(results, key=lambda r: r["row"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tailor the resume for many jobs at once.")
+    parser.add_argument("path", help="CSV or JSONL file of jobs")
+    parser.add_argument("--provider", choices=["deepseek", "openai"], default="deepseek")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute limit")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    args = parser.parse_args()
+
+    rows = load_batch_file(args.path)
+    start = time.perf_counter()
+    results = run_async(tailor_batch(rows, args.provider, args.concurrency, args.rpm,
+                                     use_cache=not args.no_cache))
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    logging.info("Batch finished: %d/%d succeeded in %.1fs",
+                 succeeded, len(results), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+import streamlit as st
+from bson import ObjectId
+from pymongo import UpdateOne
+from db.operations import get_applications_collection
+from db.storage import stored_job_description
+from utils.minhash import MinHashLSHIndex, minhash_signature, signature_from_stored, signature_to_bytes
+from utils.persistence import DebouncedSaver
+
+DUPLICATE_INDEX_PATH = st.secrets.get("DUPLICATE_INDEX_PATH", ".cache/jd_minhash_index.pkl")
+# Estimated Jaccard similarity of word shingles above which two job
+# descriptions count as the same posting
+DUPLICATE_THRESHOLD = float(st.secrets.get("DUPLICATE_JD_THRESHOLD", 0.85))
+
+# Process-wide LSH index, loaded from disk or rebuilt from MongoDB on first use,
+# and saved as described in utils/persistence.py
+_index = None
+_index_lock = threading.Lock()
+_index_saver = DebouncedSaver(lambda: _index.save(DUPLICATE_INDEX_PATH))
+
+
+def rebuild_duplicate_index(batch_size=500):
+    """
+    Rebuild the LSH index from the jd_signature stored on every application,
+    computing and storing signatures for documents saved before they existed
+    (and packing ones stored as int arrays).
+    """
+    global _index
+    index = MinHashLSHIndex()
+    collection = get_applications_collection()
+    cursor = collection.find({}, {"jd_signature": 1, "job_description": 1, "jd_compressed": 1}).batch_size(batch_size)
+    ops = []
+    for doc in cursor:
+        signature = doc.get("jd_signature")
+        if signature is None or isinstance(signature, list):
+            # Missing, or stored before signatures were packed into bytes
+            if signature is None:
+                signature = minhash_signature(stored_job_description(doc))
+            ops.append(UpdateOne({"_id": doc["_id"]},
+                                 {"$set": {"jd_signature": signature_to_bytes(signature)}}))
+        index.add(doc["_id"], signature_from_stored(signature))
+        if len(ops) >= batch_size:
+            collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    index.save(DUPLICATE_INDEX_PATH)
+    _index_saver.cancel()
+    with _index_lock:
+        _index = index
+    logging.info("Rebuilt duplicate job description index over %d applications.", len(index))
+    return index
+
+
+def get_duplicate_index():
+    """Return the shared LSH index, loading or rebuilding it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MinHashLSHIndex.load(DUPLICATE_INDEX_PATH)
+        if _index is None:
+            rebuild_duplicate_index()
+    return _index
+
+
+def index_job_description(application_id, signature):
+    """Add a newly inserted application's signature to the index and schedule a save."""
+    index = get_duplicate_index()
+    index.add(application_id, signature)
+    _index_saver.schedule()
+
+
+def unindex_job_description(*application_ids):
+    """Remove deleted applications from the index."""
+    index = get_duplicate_index()
+    for application_id in application_ids:
+        index.remove(application_id)
+    _index_saver.schedule()
+
+
+def find_near_duplicates(job_description, threshold=DUPLICATE_THRESHOLD, limit=3):
+    """
+    Stored applications whose job description is a near-duplicate of this one,
+    most similar first: [{"application_id", "similarity", "company_name", "title",
+    "job_id"}]. Problems are logged and give no matches, so tailoring goes ahead.
+    """
+    try:
+        start = time.perf_counter()
+        matches = get_duplicate_index().query(minhash_signature(job_description), threshold)[:limit]
+        logging.info("Near-duplicate lookup found %d matches in %.2f ms",
+                     len(matches), (time.perf_counter() - start) * 1000)
+        if not matches:
+            return []
+        similarity = {ObjectId(doc_id): score for doc_id, score in matches}
+        docs = get_applications_collection().find(
+            {"_id": {"$in": list(similarity)}}, {"company_name": 1, "title": 1, "job_id": 1})
+        found = [{"application_id": doc["_id"], "similarity": similarity[doc["_id"]],
+                  "company_name": doc.get("company_name", ""), "title": doc.get("title", ""),
+                  "job_id": doc.get("job_id", "")} for doc in docs]
+        return sorted(found, key=lambda match: match["similarity"], reverse=True)
+    except Exception:
+        logging.exception("Near-duplicate lookup failed")
+        return []
@@ -0,0 +1,241 @@
+"""
+Background tailoring jobs.
+
+The Tailor page enqueues a job and polls it instead of waiting on the LLM in
+the form handler, so a rerun or browser refresh does not throw the paid
+completion away. Jobs are stored in SQLite and run by a pool of asyncio
+workers on the shared LLM event loop; each one runs process_resume (or
+reuses the resume of a near-duplicate application) and stores the
+application, like a row of a batch run.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import streamlit as st
+from bson import ObjectId
+from db.operations import get_application_details
+from llm.clients import get_event_loop, run_async
+from llm.usage import get_recent_usage, usage_tag
+from logic.matching import insert_scored_application
+from logic.query_llm import load_resume, process_resume, validate_keyword_usage
+from utils.helpers import sanitize_filename
+
+JOB_QUEUE_PATH = st.secrets.get("JOB_QUEUE_PATH", ".cache/tailor_jobs.sqlite")
+JOB_WORKERS = int(st.secrets.get("JOB_WORKERS", 3))
+
+# Idle workers re-check the table this often, to pick up jobs queued by other processes
+JOB_POLL_SECONDS = 2.0
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobStore:
+    """
+    SQLite table of tailoring jobs: queued -> running -> done | failed.
+    A connection is opened per call, as in ResponseCache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def enqueue(self, params):
+        """Store a new queued job and return its id."""
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+                         (job_id, json.dumps(params), time.time()))
+        return job_id
+
+    def claim(self):
+        """Atomically mark the oldest queued job as running. Returns (job_id, params) or None."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, params FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                             (time.time(), row[0]))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def finish(self, job_id, result):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+                         (json.dumps(result, default=str), time.time(), job_id))
+
+    def fail(self, job_id, error):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                         (error, time.time(), job_id))
+
+    def requeue_running(self):
+        """
+        Put jobs left running by a stopped process back in the queue. Returns
+        how many. Assumes one app process owns the queue file.
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            ).rowcount
+
+    def _row_to_job(self, row):
+        job_id, status, params, result, error, created_at, started_at, finished_at = row
+        return {"id": job_id, "status": status, "params": json.loads(params),
+                "result": json.loads(result) if result else None, "error": error,
+                "created_at": created_at, "started_at": started_at, "finished_at": finished_at}
+
+    def get(self, job_id):
+        """Return a job as a dict, or None if it does not exist."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def recent(self, limit=10):
+        """The most recently created jobs, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+
+job_store = JobStore(JOB_QUEUE_PATH)
+
+# Streamed section events of running jobs in this process, for progressive rendering
+_job_events = {}
+_workers = []
+_wake = None
+_lock = threading.Lock()
+
+
+async def run_tailor_job(job_id, params):
+    """Tailor the resume for one job and store the application. Returns the job result."""
+    usage_tag.set(job_id)
+    events = _job_events.setdefault(job_id, [])
+    base_resume = None
+    if params.get("base_application_id"):
+        # Reuse or adapt the resume of a near-duplicate application
+        details = await asyncio.to_thread(get_application_details, ObjectId(params["base_application_id"]))
+        base_resume = details.get("resume_content")
+        if not base_resume:
+            raise ValueError("The earlier application to reuse no longer exists.")
+    if params.get("reuse") == "copy":
+        enhanced_resume = base_resume
+        missing_keywords = validate_keyword_usage(load_resume() or {}, base_resume, params["keywords"])
+    else:
+        enhanced_resume, missing_keywords = await process_resume(
+            params["job_description"],
+            params["additional_instructions"],
+            params["company"],
+            params["title"],
+            params["api_choice"],
+            params["job_id"],
+            params["keywords"],
+            use_cache=params["use_cache"],
+            on_section=events.append if params["stream"] else None,
+            strategy=params["strategy"],
+            hedge=params["hedge"],
+            base_resume=base_resume,
+        )
+    if not enhanced_resume:
+        raise ValueError("Failed to parse the AI response.")
+    sanitized_name = sanitize_filename(params["company"], params["title"], params["job_id"])
+    application_id, matching_score = await asyncio.to_thread(
+        insert_scored_application, params["company"], params["title"], params["job_id"],
+        enhanced_resume, params["job_description"], sanitized_name)
+    usage = get_recent_usage(tag=job_id)
+    return {
+        "application_id": str(application_id),
+        "matching_score": matching_score,
+        "enhanced_resume": enhanced_resume,
+        "missing_keywords": missing_keywords,
+        "usage": {
+            "prompt_tokens": sum(record["prompt_tokens"] for record in usage),
+            "cached_tokens": sum(record["cached_tokens"] for record in usage),
+            "completion_tokens": sum(record["completion_tokens"] for record in usage),
+            "latency_seconds": max((record["latency_seconds"] for record in usage), default=0.0),
+        },
+    }
+
+
+async def _job_worker(number):
+    while True:
+        _wake.clear()
+        claimed = await asyncio.to_thread(job_store.claim)
+        if claimed is None:
+            try:
+                await asyncio.wait_for(_wake.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        job_id, params = claimed
+        logging.info("Worker %d running job %s (%s - %s)", number, job_id, params["company"], params["title"])
+        start = time.perf_counter()
+        try:
+            result = await run_tailor_job(job_id, params)
+            await asyncio.to_thread(job_store.finish, job_id, result)
+            logging.info("Job %s done in %.1fs", job_id, time.perf_counter() - start)
+        except Exception as e:
+            logging.exception("Job %s failed", job_id)
+            await asyncio.to_thread(job_store.fail, job_id, str(e))
+        finally:
+            _job_events.pop(job_id, None)
+
+
+async def _start_workers(workers):
+    global _wake
+    _wake = asyncio.Event()
+    for number in range(workers):
+        _workers.append(asyncio.create_task(_job_worker(number)))
+
+
+def start_job_workers(workers=JOB_WORKERS):
+    """Start the worker pool on the shared LLM event loop (once per process)."""
+    with _lock:
+        if _workers:
+            return
+        requeued = job_store.requeue_running()
+        if requeued:
+            logging.info("Requeued %d interrupted tailoring jobs.", requeued)
+        run_async(_start_workers(workers))
+        logging.info("Started %d tailoring job workers.", workers)
+
+
+def submit_tailor_job(params):
+    """Queue a tailoring job, making sure the workers are running. Returns the job id."""
+    job_id = job_store.enqueue(params)
+    start_job_workers()
+    get_event_loop().call_soon_threadsafe(_wake.set)
+    logging.info("Queued tailoring job %s for %s - %s", job_id, params["company"], params["title"])
+    return job_id
+
+
+def get_job_events(job_id, start=0):
+    """Section events streamed so far by a running job, from index `start`."""
+    return list(_job_events.get(job_id, ())[start:])
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import streamlit as st
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from db.application_store import get_application_store
+from db.operations import (
+    DETAIL_PROJECTION,
+    expand_application,
+    get_application_ids,
+    get_applications_by_ids,
+    get_applications_collection,
+    insert_application,
+)
+from db.storage import stored_job_description
+from logic.duplicates import index_job_description
+from logic.prompt_assets import get_base_resume
+from utils.minhash import minhash_signature
+from utils.persistence import DebouncedSaver
+from utils.keyword_matcher import iter_resume_text
+from utils.text_processing import compute_matching_score
+from utils.tfidf_index import CorpusTfidfIndex
+
+INDEX_PATH = st.secrets.get("TFIDF_INDEX_PATH", ".cache/tfidf_index.pkl")
+
+# Process-wide corpus index, loaded from disk or rebuilt from MongoDB on first
+# use, and saved as described in utils/persistence.py
+_index = None
+_index_lock = threading.Lock()
+_index_saver = DebouncedSaver(lambda: _index.save(INDEX_PATH))
+
+
+def resume_to_text(resume):
+    """Flatten the tailorable text of a resume (coursework, bullets, skills)."""
+    return " ".join(text for _, text in iter_resume_text(resume))
+
+
+def rebuild_tfidf_index(batch_size=500):
+    """Fit a fresh index over every stored job description and save it."""
+    global _index
+    index = CorpusTfidfIndex()
+    collection = get_applications_collection()
+    cursor = collection.find({}, {"job_description": 1, "jd_compressed": 1}).batch_size(batch_size)
+    for doc in cursor:
+        index.add_document(doc["_id"], stored_job_description(doc))
+    index.save(INDEX_PATH)
+    _index_saver.cancel()
+    with _index_lock:
+        _index = index
+    logging.info("Rebuilt TF-IDF index over %d job descriptions.", len(index))
+    return index
+
+
+def get_tfidf_index():
+    """Return the shared corpus index, loading or rebuilding it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CorpusTfidfIndex.load(INDEX_PATH)
+        if _index is None:
+            rebuild_tfidf_index()
+    return _index
+
+
+def score_resume(resume, job_description):
+    """Match score (0-1) of a tailored resume against its job description, with corpus IDF."""
+    score = compute_matching_score(job_description, resume_to_text(resume), index=get_tfidf_index())
+    return round(float(score), 4)
+
+
+def index_application(application_id, job_description):
+    """Add a newly inserted application's job description to the index (saved shortly after)."""
+    index = get_tfidf_index()
+    index.add_document(application_id, job_description)
+    _index_saver.schedule()
+
+
+def unindex_application(*application_ids):
+    """Remove deleted applications' job descriptions from the index (saved shortly after)."""
+    index = get_tfidf_index()
+    for application_id in application_ids:
+        index.remove_document(application_id)
+    _index_saver.schedule()
+
+
+def insert_scored_application(company, title, job_id, resume_content, job_description, sanitized_filename):
+    """
+    Insert an application with its matching_score, storing the resume as a
+    delta against the current base resume. Adds its job description to the
+    TF-IDF and near-duplicate indexes and invalidates the tracker cache.
+    Scoring and indexing problems are logged and never block the insert.
+    Returns (application_id, matching_score).
+    """
+    try:
+        matching_score = score_resume(resume_content, job_description)
+    except Exception:
+        logging.exception("Could not score application for %s - %s", company, title)
+        matching_score = None
+    jd_signature = minhash_signature(job_description)
+    application_id = insert_application(company, title, job_id, resume_content, job_description,
+                                        sanitized_filename, matching_score=matching_score,
+                                        jd_signature=jd_signature, base_resume=get_base_resume())
+    try:
+        index_application(application_id, job_description)
+    except Exception:
+        logging.exception("Could not index application %s", application_id)
+    try:
+        index_job_description(application_id, jd_signature)
+    except Exception:
+        logging.exception("Could not add application %s to the duplicate index", application_id)
+    get_application_store().apply_insert()
+    return application_id, matching_score
+
+
+def rank_applications_by_fit(resume, query=None, page=0, page_size=10):
+    """
+    One page of the applications matching `query`, ordered by how well
+    `resume` fits their job descriptions, best first. The resume is scored
+    against every stored job description in one sparse matrix product; each
+    returned summary carries its fit_score.
+    """
+    scores = get_tfidf_index().score_all(resume_to_text(resume))
+    ranked = sorted(get_application_ids(query), key=lambda doc_id: scores.get(str(doc_id), 0.0), reverse=True)
+    apps = get_applications_by_ids(ranked[page * page_size:(page + 1) * page_size])
+    for doc in apps:
+        doc["fit_score"] = round(scores.get(str(doc["_id"]), 0.0), 4)
+    return apps
+
+
+# Backfill worker state: each process receives the corpus index once
+_worker_index = None
+
+
+def _init_score_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _score_chunk(items):
+    """Score (application_id, resume_content, job_description) items in a worker process."""
+    return [(application_id, round(float(_worker_index.score_pair(job_description, resume_to_text(resume))), 4))
+            for application_id, resume, job_description in items]
+
+
+def _read_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return ObjectId(json.load(f)["last_id"])
+
+
+def _write_checkpoint(path, last_id):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"last_id": str(last_id)}, f)
+
+
+def backfill_matching_scores(batch_size=500, workers=None,
+                             checkpoint_path=".cache/backfill_matching_score.json", restart=False):
+    """
+    Compute matching_score for every application that lacks one. Documents are
+    streamed in _id order, batch by batch, scored across a process pool and
+    written back with one bulk_write per batch. The last processed _id is
+    checkpointed after every batch so an interrupted run resumes from there.
+    """
+    index = get_tfidf_index()
+    collection = get_applications_collection()
+    last_id = None if restart else _read_checkpoint(checkpoint_path)
+    if last_id is not None:
+        logging.info("Resuming matching_score backfill after _id %s", last_id)
+
+    workers = workers or os.cpu_count() or 1
+    processed = written = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_score_worker, initargs=(index,)) as pool:
+        while True:
+            query = {"matching_score": {"$exists": False}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = list(collection.find(query, DETAIL_PROJECTION)
+                         .sort("_id", ASCENDING)
+                         .limit(batch_size))
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+            batch = [expand_application(doc) for doc in batch]
+            items = [(doc["_id"], doc["resume_content"], doc["job_description"]) for doc in batch
+                     if doc.get("resume_content") and doc.get("job_description")]
+            chunk_size = max(1, -(-len(items) // workers))
+            chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+            ops = [UpdateOne({"_id": application_id}, {"$set": {"matching_score": score}})
+                   for scored in pool.map(_score_chunk, chunks)
+                   for application_id, score in scored]
+            if ops:
+                written += collection.bulk_write(ops, ordered=False).modified_count
+            processed += len(batch)
+            _write_checkpoint(checkpoint_path, last_id)
+            elapsed = time.perf_counter() - start
+            logging.info("Backfilled %d documents (%d scored) in %.1fs: %.1f docs/s",
+                         processed, written, elapsed, processed / elapsed if elapsed else 0.0)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logging.info("matching_score backfill finished: %d documents scored.", written)
+    return written
@@ -0,0 +1,101 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+import streamlit as st
+from prompts.prompt_engineering import format_action_verbs
+
+RESUME_PATH = "data/resume.json"
+ACTION_VERBS_PATH = "data/action_verbs.json"
+
+# How often (seconds) the source files and secrets are checked for changes;
+# between checks, prompt assets are served from memory without any I/O
+ASSET_RECHECK_SECONDS = 5.0
+
+# Process-wide cache: name -> {"version": ..., "value": ..., "checked": monotonic time}
+_assets = {}
+_lock = threading.Lock()
+
+
+def _file_version(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def _resume_secret():
+    try:
+        if "resume" in st.secrets and "data" in st.secrets["resume"]:
+            return st.secrets["resume"]["data"]
+    except Exception as e:
+        logging.error("Could not read resume from secrets: %s", str(e))
+    return None
+
+
+def _resume_version():
+    secret = _resume_secret()
+    if secret is not None:
+        return ("secrets", secret)
+    return _file_version(RESUME_PATH)
+
+
+def _read_resume(version):
+    if version and version[0] == "secrets":
+        return json.loads(version[1])
+    with open(RESUME_PATH, "r") as f:
+        return json.load(f)
+
+
+def _read_action_verbs_block(version):
+    with open(ACTION_VERBS_PATH, "r") as f:
+        return format_action_verbs(json.load(f))
+
+
+def _get_asset(name, get_version, load):
+    """
+    Return the cached value of `name`, reloading it when its version (file
+    mtime/size or secret value) has changed. Versions are re-read at most every
+    ASSET_RECHECK_SECONDS. Load errors are logged and give None.
+    """
+    now = time.monotonic()
+    entry = _assets.get(name)
+    if entry is not None and now - entry["checked"] < ASSET_RECHECK_SECONDS:
+        return entry["value"]
+    with _lock:
+        entry = _assets.get(name)
+        version = get_version()
+        if entry is not None and entry["version"] == version:
+            entry["checked"] = now
+            return entry["value"]
+        try:
+            value = load(version)
+        except Exception as e:
+            logging.error("Loading %s failed: %s", name, str(e))
+            return None
+        _assets[name] = {"version": version, "value": value, "checked": now}
+        logging.info("Loaded prompt asset %s.", name)
+        return value
+
+
+def get_base_resume():
+    """
+    The base resume (from st.secrets["resume"]["data"] or data/resume.json), or
+    None if it cannot be loaded. Each call returns a private copy, so callers
+    can never modify the shared one.
+    """
+    resume = _get_asset("resume", _resume_version, _read_resume)
+    return copy.deepcopy(resume) if resume is not None else None
+
+
+def get_action_verbs_block():
+    """The formatted action-verb prompt block (an immutable string), or None if it cannot be loaded."""
+    return _get_asset("action_verbs", lambda: _file_version(ACTION_VERBS_PATH), _read_action_verbs_block)
+
+
+def preload_prompt_assets():
+    """Load the resume and action-verb block ahead of the first request."""
+    return get_base_resume() is not None and get_action_verbs_block() is not None
@@ -3,110 +3,382 @@ import json
 import logging
 import streamlit as st
 import asyncio
-from prompts.prompt_engineering import get_system_prompt, get_user_prompt
+import time
+from prompts.prompt_engineering import (get_system_prompt, get_user_prompt, get_section_user_prompt,
+                                        get_patch_user_prompt)
 from utils.text_processing import compute_matching_score
-from openai import OpenAI
+from llm.response_cache import ResponseCache, make_cache_key
+from llm.clients import get_async_client, DEEPSEEK_BASE_URL, OPENAI_BASE_URL
+from llm.usage import latency_percentile, record_attempt_latency
+from logic.prompt_assets import get_action_verbs_block, get_base_resume
+from utils.incremental_json import IncrementalSectionParser
+from utils.resume_patch import apply_patch, list_patch_targets
+from utils.keyword_matcher import get_keyword_matcher, normalize_keyword
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Initialize clients
+# Long-lived async clients (one per base URL, sharing one HTTP pool) are built
+# on first use by get_llm_client, so importing this module stays cheap
 OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
 DEEPSEEK_API_KEY = st.secrets["DEEPSEEK_API_KEY"]
-deepseek_client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
 
-def format_action_verbs(action_verbs):
-    action_verbs = ""
-    for verb in action_verbs:
-        action_verbs += f"- {verb}: {" ".join(action_verbs[verb])}\n"
-    
-    print(action_verbs)
-    return action_verbs
+# Persistent cache of raw LLM responses keyed by provider, model, params and prompts
+response_cache = ResponseCache(
+    st.secrets.get("LLM_CACHE_PATH", ".cache/llm_responses.sqlite"),
+    max_entries=int(st.secrets.get("LLM_CACHE_MAX_ENTRIES", 500)),
+    max_age_seconds=int(st.secrets.get("LLM_CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600,
+)
+
+# Hedged mode: fallback delay before asking the second provider, and the
+# latency percentile of the primary used instead once enough samples exist
+HEDGE_DELAY_SECONDS = float(st.secrets.get("HEDGE_DELAY_SECONDS", 30))
+HEDGE_LATENCY_PERCENTILE = float(st.secrets.get("HEDGE_LATENCY_PERCENTILE", 90))
+HEDGE_MIN_SAMPLES = 5
+
+def get_llm_client(api_choice):
+    """Return the shared async client for "openai" or "deepseek"."""
+    if api_choice == "openai":
+        return get_async_client(OPENAI_API_KEY, OPENAI_BASE_URL)
+    return get_async_client(DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL)
 
 def load_resume():
-    """Load resume from secrets or file with enhanced error handling"""
-    try:
-        if "resume" in st.secrets and "data" in st.secrets["resume"]:
-            return json.loads(st.secrets["resume"]["data"])
-        with open("data/resume.json", "r") as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error("Resume loading failed: %s", str(e))
-        return None
+    """Return a private copy of the base resume from the process-wide asset cache."""
+    return get_base_resume()
 
 def validate_keyword_usage(original_resume, enhanced_resume, keywords):
     """
     Validate keyword integration and return missing keywords.
     Only flags keywords missing in both original and enhanced resumes.
+    Matching runs over bullet, coursework and skills text only, on word
+    boundaries, with a matcher built once per keyword set.
     """
     if not keywords:
         return []
-    
-    original_text = json.dumps(original_resume).lower()
-    enhanced_text = json.dumps(enhanced_resume).lower()
-    
-    missing = []
-    for kw in keywords:
-        kw_lower = kw.lower()
-        # Check if keyword exists in either version
-        in_original = kw_lower in original_text
-        in_enhanced = kw_lower in enhanced_text
-        
-        if not in_original and not in_enhanced:
-            missing.append(kw)
-    
-    return missing
+
+    matcher = get_keyword_matcher(tuple(sorted({normalize_keyword(kw) for kw in keywords})))
+    covered = matcher.covered(original_resume) | matcher.covered(enhanced_resume)
+    return [kw for kw in keywords if normalize_keyword(kw) not in covered]
+
+async def stream_llm_response(chunks, on_section):
+    """
+    Consume a stream of completion deltas, passing each completed resume
+    section/entry to on_section as it closes. Returns the full response text.
+    """
+    parser = IncrementalSectionParser()
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+        for event in parser.feed(chunk):
+            on_section(event)
+    return "".join(parts).strip()
+
+def provider_cache_key(api_choice, system_prompt, user_prompt):
+    """Response cache key for a prompt pair sent to `api_choice`."""
+    if api_choice == "openai":
+        from llm.openai_client import OPENAI_MODEL, OPENAI_PARAMS
+        return make_cache_key("openai", OPENAI_MODEL, OPENAI_PARAMS, system_prompt, user_prompt)
+    from llm.deepseek_client import DEEPSEEK_MODEL, DEEPSEEK_PARAMS
+    return make_cache_key("deepseek", DEEPSEEK_MODEL, DEEPSEEK_PARAMS, system_prompt, user_prompt)
+
+async def call_provider(api_choice, system_prompt, user_prompt, on_section=None):
+    """
+    One uncached completion from `api_choice`, streamed when on_section is
+    given. The elapsed time is recorded for get_hedge_delay() even when the
+    call fails or is cancelled.
+    """
+    start = time.perf_counter()
+    try:
+        return await _call_provider(api_choice, system_prompt, user_prompt, on_section)
+    finally:
+        record_attempt_latency(api_choice, time.perf_counter() - start)
+
+async def _call_provider(api_choice, system_prompt, user_prompt, on_section):
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    client = get_llm_client(api_choice)
+    if api_choice == "openai":
+        from llm.openai_client import async_call_openai_api, async_stream_openai_api
+        if on_section is not None:
+            return await stream_llm_response(async_stream_openai_api(messages, client), on_section)
+        return await async_call_openai_api(messages, client)
+    from llm.deepseek_client import async_call_deepseek_api, async_stream_deepseek_api
+    if on_section is not None:
+        return await stream_llm_response(
+            async_stream_deepseek_api(system_prompt, user_prompt, client), on_section)
+    return await async_call_deepseek_api(system_prompt, user_prompt, client)
+
+async def get_llm_response(api_choice, system_prompt, user_prompt, use_cache=True, on_section=None,
+                           hedge=False):
+    """
+    Get one completion as (response_text, cache_key, from_cache). Served from
+    the response cache when possible, streamed when on_section is given.
+    With hedge=True the request is hedged across both providers (see
+    get_hedged_response); hedged requests are never streamed.
+    """
+    if hedge:
+        return await get_hedged_response(api_choice, system_prompt, user_prompt, use_cache)
+
+    cache_key = provider_cache_key(api_choice, system_prompt, user_prompt)
+    # The cache is SQLite on disk: keep its lock waits off the shared event loop
+    llm_response = await asyncio.to_thread(response_cache.get, cache_key) if use_cache else None
+    if llm_response is not None:
+        return llm_response, cache_key, True
+
+    llm_response = await call_provider(api_choice, system_prompt, user_prompt, on_section)
+    return llm_response, cache_key, False
+
+def is_usable_response(llm_response):
+    """True if a completion is non-empty and parses as JSON."""
+    if not llm_response:
+        return False
+    try:
+        parse_llm_json(llm_response)
+    except Exception:
+        return False
+    return True
+
+def get_hedge_delay(api_choice):
+    """
+    Seconds to wait for `api_choice` before also asking the other provider:
+    its HEDGE_LATENCY_PERCENTILE latency over recent calls (including failed
+    and cancelled ones), or HEDGE_DELAY_SECONDS until HEDGE_MIN_SAMPLES calls
+    have been seen.
+    """
+    delay = latency_percentile(api_choice, HEDGE_LATENCY_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES)
+    return HEDGE_DELAY_SECONDS if delay is None else delay
+
+async def get_hedged_response(primary, system_prompt, user_prompt, use_cache=True):
+    """
+    Ask `primary` first and, if it has not produced a usable response after
+    get_hedge_delay() seconds (or fails sooner), the other provider as well.
+    The first response that parses wins and the other request is cancelled.
+    Returns (response_text, cache_key, from_cache) for the winning provider.
+    """
+    secondary = "openai" if primary == "deepseek" else "deepseek"
+    if use_cache:
+        for provider in (primary, secondary):
+            cache_key = provider_cache_key(provider, system_prompt, user_prompt)
+            llm_response = await asyncio.to_thread(response_cache.get, cache_key)
+            if llm_response is not None:
+                return llm_response, cache_key, True
+
+    delay = get_hedge_delay(primary)
+    providers = {asyncio.create_task(call_provider(primary, system_prompt, user_prompt)): primary}
+    pending = set(providers)
+    hedged = False
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=None if hedged else delay,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = providers[task]
+                try:
+                    llm_response = task.result()
+                except Exception:
+                    logging.exception("Hedged %s request failed", provider)
+                    llm_response = ""
+                if is_usable_response(llm_response):
+                    logging.info("Hedged request won by %s (primary %s, hedged: %s)", provider, primary, hedged)
+                    return llm_response, provider_cache_key(provider, system_prompt, user_prompt), False
+                logging.warning("Hedged %s response unusable", provider)
+            if not hedged:
+                if done:
+                    logging.info("%s failed; falling back to %s", primary, secondary)
+                else:
+                    logging.info("%s slower than %.1fs; hedging to %s", primary, delay, secondary)
+                task = asyncio.create_task(call_provider(secondary, system_prompt, user_prompt))
+                providers[task] = secondary
+                pending.add(task)
+                hedged = True
+    finally:
+        for task in pending:
+            task.cancel()
+    logging.error("Hedged request failed on both %s and %s", primary, secondary)
+    return "", provider_cache_key(primary, system_prompt, user_prompt), False
+
+def parse_llm_json(llm_response):
+    """
+    Strip an optional ```json fence and parse the response.
+    Returns (parsed, cleaned_text); raises json.JSONDecodeError on bad JSON.
+    """
+    if "```json" in llm_response:
+        llm_response = re.search(r"```json(.*?)```", llm_response, re.DOTALL).group(1).strip()
+    return json.loads(llm_response), llm_response
+
+# Resume keys tailored together by each call in "sections" mode
+SECTION_GROUPS = {
+    "experience": ("experience",),
+    "projects": ("projects",),
+    "skills": ("coursework", "skills"),
+}
+
+def distribute_keywords(resume, keywords):
+    """
+    Split keywords between the experience and projects sections in the same
+    2:1 ratio as their bullet limits (6 and 3). The skills call only gets
+    what the bullets leave out (see uncovered_by_bullets).
+    """
+    keywords = sorted(keywords)
+    if not resume.get("projects"):
+        return {"experience": keywords, "projects": []}
+    experience = [kw for i, kw in enumerate(keywords) if i % 3 != 2]
+    projects = [kw for i, kw in enumerate(keywords) if i % 3 == 2]
+    return {"experience": experience, "projects": projects}
+
+def uncovered_by_bullets(resume, keywords):
+    """Keywords that no experience or project bullet of `resume` mentions."""
+    if not keywords:
+        return []
+    matcher = get_keyword_matcher(tuple(sorted({normalize_keyword(kw) for kw in keywords})))
+    covered = matcher.covered({key: resume.get(key, []) for key in ("experience", "projects")})
+    return [kw for kw in keywords if normalize_keyword(kw) not in covered]
+
+async def tailor_section(group, original_resume, job_description, action_verbs_block,
+                         additional_instructions, keywords, api_choice, use_cache, on_section, hedge=False):
+    """
+    Tailor one section group with its own LLM call. Returns the tailored keys,
+    or the original ones if the response cannot be used.
+    """
+    section = {key: original_resume[key] for key in SECTION_GROUPS[group] if key in original_resume}
+    if not section:
+        return {}
+    system_prompt = get_system_prompt()
+    user_prompt = get_section_user_prompt(group, section, job_description, action_verbs_block,
+                                          additional_instructions, keywords)
+    llm_response, cache_key, from_cache = await get_llm_response(
+        api_choice, system_prompt, user_prompt, use_cache, hedge=hedge)
+    try:
+        tailored, cleaned_response = parse_llm_json(llm_response)
+    except Exception as e:
+        logging.error("Section %s response unusable, keeping original: %s", group, str(e))
+        return section
+    if not from_cache:
+        await asyncio.to_thread(response_cache.set, cache_key, cleaned_response)
+
+    result = {key: tailored.get(key, section[key]) for key in section}
+    if on_section is not None:
+        for key, value in result.items():
+            on_section(("section", key, value))
+    return result
+
+async def tailor_sections(original_resume, job_description, action_verbs_block,
+                          additional_instructions, keywords, api_choice, use_cache, on_section, hedge=False):
+    """
+    Tailor experience and projects concurrently, then skills/coursework with
+    only the keywords the new bullets did not place, and merge them back into
+    the original resume structure. Given every keyword, the skills call would
+    add them all to skills, which the prompts forbid and which hides missing
+    keywords from validate_keyword_usage.
+    """
+    section_keywords = distribute_keywords(original_resume, keywords)
+    results = await asyncio.gather(*[
+        tailor_section(group, original_resume, job_description, action_verbs_block,
+                       additional_instructions, section_keywords[group], api_choice,
+                       use_cache, on_section, hedge)
+        for group in section_keywords
+    ])
+    enhanced_resume = dict(original_resume)
+    for result in results:
+        enhanced_resume.update(result)
+    leftover = uncovered_by_bullets(enhanced_resume, keywords)
+    enhanced_resume.update(await tailor_section(
+        "skills", original_resume, job_description, action_verbs_block,
+        additional_instructions, leftover, api_choice, use_cache, on_section, hedge))
+    return enhanced_resume
+
+async def tailor_with_patch(original_resume, job_description, action_verbs_block,
+                            additional_instructions, keywords, api_choice, use_cache, hedge=False):
+    """
+    Ask the model for a JSON Patch of changed bullets only, then validate and
+    apply it to the original resume. Returns None if the patch is unusable.
+    """
+    system_prompt = get_system_prompt(output_format="patch")
+    user_prompt = get_patch_user_prompt(job_description, list_patch_targets(original_resume),
+                                        action_verbs_block, additional_instructions, keywords)
+    llm_response, cache_key, from_cache = await get_llm_response(
+        api_choice, system_prompt, user_prompt, use_cache, hedge=hedge)
+    try:
+        patch, cleaned_response = parse_llm_json(llm_response)
+        enhanced_resume = apply_patch(original_resume, patch)
+    except Exception as e:
+        logging.error("Patch response unusable: %s. Raw response: %s", str(e), llm_response)
+        return None
+    if not from_cache:
+        await asyncio.to_thread(response_cache.set, cache_key, cleaned_response)
+    return enhanced_resume
 
 async def process_resume(job_description, additional_instructions, company, position, 
-                        api_choice="deepseek", job_id="", keywords=[]):
+                        api_choice="deepseek", job_id="", keywords=[], use_cache=True,
+                        on_section=None, strategy="full", hedge=False, base_resume=None):
     """
-    Main processing function with keyword validation and retry logic
+    Main processing function with keyword validation and retry logic.
+    Identical requests are served from the response cache unless use_cache is False.
+    When on_section is given, the completion is streamed and on_section receives
+    IncrementalSectionParser events as each section closes.
+    strategy="sections" tailors experience, projects and skills with concurrent
+    calls instead of one whole-resume call; strategy="patch" asks only for the
+    changed bullets as a JSON Patch and applies it locally.
+    hedge=True also sends each call to the other provider if api_choice is
+    slow or fails, and uses whichever usable response arrives first.
+    base_resume replaces the stored base resume as the starting point, e.g. to
+    adapt a resume already tailored for a near-duplicate job.
     """
     logging.info("Starting resume processing for %s at %s", position, company)
     
-    original_resume = load_resume()
+    original_resume = base_resume if base_resume is not None else load_resume()
     if not original_resume:
-        st.error("Failed to load resume data")
-        return None, []
+        # Runs on the LLM event loop thread, where st.error would not reach the
+        # page; the job queue records the message of the exception instead
+        logging.error("Failed to load resume data")
+        raise ValueError("Failed to load resume data.")
 
-    try:
-        with open("data/action_verbs.json", "r") as f:
-            action_verbs = json.load(f)
-    except Exception as e:
-        logging.error("Action verbs load failed: %s", str(e))
+    action_verbs_block = get_action_verbs_block()
+    if action_verbs_block is None:
         return None, []
 
+    if strategy == "sections":
+        enhanced_resume = await tailor_sections(
+            original_resume, job_description, action_verbs_block,
+            additional_instructions, keywords, api_choice, use_cache, on_section, hedge)
+        missing_keywords = validate_keyword_usage(original_resume, enhanced_resume, keywords)
+        return enhanced_resume, missing_keywords
+
+    if strategy == "patch":
+        enhanced_resume = await tailor_with_patch(
+            original_resume, job_description, action_verbs_block,
+            additional_instructions, keywords, api_choice, use_cache, hedge)
+        if enhanced_resume is None:
+            return None, []
+        missing_keywords = validate_keyword_usage(original_resume, enhanced_resume, keywords)
+        return enhanced_resume, missing_keywords
+
     # Generate prompts
     system_prompt = get_system_prompt()
     user_prompt = get_user_prompt(job_description, original_resume, 
-                                 format_action_verbs(action_verbs), additional_instructions, keywords)
+                                 action_verbs_block, additional_instructions, keywords)
 
-    # LLM API selection
-    if api_choice == "openai":
-        from llm.openai_client import async_call_openai_api
-        llm_response = await async_call_openai_api([
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ])
-    else:
-        from llm.deepseek_client import async_call_deepseek_api
-        llm_response = await async_call_deepseek_api(system_prompt, user_prompt, deepseek_client)
+    llm_response, cache_key, from_cache = await get_llm_response(
+        api_choice, system_prompt, user_prompt, use_cache, on_section, hedge)
 
     # Response cleaning
     try:
-        if "```json" in llm_response:
-            llm_response = re.search(r"```json(.*?)```", llm_response, re.DOTALL).group(1).strip()
-        enhanced_resume = json.loads(llm_response)
+        enhanced_resume, llm_response = parse_llm_json(llm_response)
     except json.JSONDecodeError:
         logging.error("JSON decode failed. Raw response: %s", llm_response)
-        st.error("Failed to parse AI response. Please try again.")
-        return None, []
+        raise ValueError("Failed to parse AI response. Please try again.")
     except Exception as e:
         logging.error("Response processing failed: %s", str(e))
         return None, []
 
+    # Only responses that parsed are worth caching
+    if not from_cache:
+        await asyncio.to_thread(response_cache.set, cache_key, llm_response)
+
     # Keyword validation
     missing_keywords = validate_keyword_usage(original_resume, enhanced_resume, keywords)
     
-    return enhanced_resume, missing_keywords
\ No newline at end of file
+    return enhanced_resume, missing_keywords
@@ -0,0 +1,91 @@
+import streamlit as st
+import logging
+import queue
+from llm.clients import submit_async
+from logic.batch_tailor import parse_batch_rows, tailor_batch
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+st.set_page_config(page_title="Batch Tailor", page_icon="📦", layout="wide")
+
+
+def main():
+    st.title("Batch Tailor 📦")
+    st.write("Upload a CSV or JSONL file with the columns "
+             "`company`, `title`, `job_id`, `description`, `keywords` (and optionally `instructions`).")
+
+    with st.form("batch_form"):
+        uploaded = st.file_uploader("Jobs file", type=["csv", "jsonl"])
+        col1, col2 = st.columns(2)
+        with col1:
+            api_choice = st.radio("AI Model", options=["Deepseek", "Open AI"], index=0)
+            bypass_cache = st.checkbox("Bypass response cache")
+        with col2:
+            concurrency = st.slider("Concurrent requests", min_value=1, max_value=20, value=5)
+            rpm = st.number_input("Requests per minute", min_value=1, max_value=600, value=30)
+        submitted = st.form_submit_button("Tailor All")
+
+    if not submitted:
+        return
+    if uploaded is None:
+        st.error("Please upload a jobs file.")
+        return
+
+    file_format = "jsonl" if uploaded.name.endswith(".jsonl") else "csv"
+    try:
+        rows = parse_batch_rows(uploaded.getvalue().decode("utf-8"), file_format)
+    except Exception as e:
+        st.error(f"Could not read the file: {e}")
+        logging.exception("Batch file parse error")
+        return
+    if not rows:
+        st.warning("The file has no rows.")
+        return
+
+    progress = st.progress(0.0, text=f"0 of {len(rows)} done")
+    table = st.empty()
+    finished = []
+
+    # Rows finish on the shared LLM event loop thread; widgets may only be
+    # updated from this script thread, so results are handed over via a queue.
+    finished_queue = queue.Queue()
+    future = submit_async(tailor_batch(
+        rows,
+        api_choice="openai" if api_choice == "Open AI" else "deepseek",
+        concurrency=concurrency,
+        requests_per_minute=int(rpm),
+        use_cache=not bypass_cache,
+        on_result=finished_queue.put,
+    ))
+
+    while len(finished) < len(rows):
+        try:
+            finished.append(finished_queue.get(timeout=0.5))
+        except queue.Empty:
+            if future.done():
+                break
+            continue
+        progress.progress(len(finished) / len(rows), text=f"{len(finished)} of {len(rows)} done")
+        table.dataframe(
+            [{
+                "Row": r["row"] + 1,
+                "Company": r["company"],
+                "Title": r["title"],
+                "Status": r["status"],
+                "Seconds": r.get("seconds", ""),
+                "Match": r.get("matching_score"),
+                "Missing Keywords": ", ".join(r["missing_keywords"]),
+                "Error": r["error"],
+            } for r in sorted(finished, key=lambda r: r["row"])],
+            use_container_width=True,
+        )
+
+    results = future.result()
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    if succeeded == len(results):
+        st.success(f"All {succeeded} resumes tailored and saved.")
+    else:
+        st.warning(f"{succeeded} of {len(results)} resumes tailored. See the table for failures.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,233 @@
 
 import streamlit as st
 import logging
+import pandas as pd
 from datetime import datetime
-from db.operations import (
-    get_all_applications,
-    update_application_status,
-    update_application_toggle,
-    delete_application
-)
+from db.application_store import get_application_store
+from db.operations import build_applications_query, get_application_details
+from logic.matching import rank_applications_by_fit, unindex_application
+from logic.prompt_assets import get_base_resume
+from logic.duplicates import unindex_job_description
 from utils.format_resume_data import render_resume
 from utils.linkedin_message_generator import generate_linkedin_message
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 st.set_page_config(page_title="Job Application Tracker", page_icon="📋", layout="wide")
 
-# -- Caching the DB call to speed up repeated runs
-@st.cache_data
-def fetch_all_applications():
-    return get_all_applications()
+PAGE_SIZE = 10
+# Rows per page in the grid view, where applications are triaged in bulk
+GRID_PAGE_SIZE = 50
+
+STATUS_OPTIONS = ["not applied", "applied", "interview", "rejected", "selected"]
+# Bulk action choice that leaves a field as it is
+NO_CHANGE = "(no change)"
+
+# Maps the "Sort by" labels to db.operations.SORT_SPECS keys
+SORT_KEYS = {
+    "Date (newest first)": "date_desc",
+    "Date (oldest first)": "date_asc",
+    "Company": "company",
+    "Status": "status",
+    "Match score": "match_desc",
+    "Relevance (search)": "relevance",
+    "Fit to my base resume": "fit",
+}
+
+def format_date_applied(value):
+    """Format the stored date_applied datetime for display."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value or "N/A"
+
+
+def render_application_cards(store, paged_apps):
+    """One card per application, each with its own save form and actions."""
+    status_emojis = {
+        "not applied": "🟠",
+        "applied": "🟢",
+        "interview": "🔵",
+        "rejected": "🔴",
+        "selected": "🟢"
+    }
+
+    for doc in paged_apps:
+        company = doc.get('company_name', '')
+        title = doc.get('title', '')
+        job_id = doc.get('job_id', 'N/A')
+        date_applied = format_date_applied(doc.get('date_applied'))
+        primary_status = doc.get("primary_status", doc.get("status", "not applied"))
+        secondary_status = doc.get("secondary_status", "")
+        effective_status = secondary_status if secondary_status else primary_status
+        emoji = status_emojis.get(effective_status, "⚪")
+
+        with st.container():
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.subheader(f"{company} - {title}")
+                match_text = f" | Match: {doc['matching_score']:.0%}" if doc.get("matching_score") is not None else ""
+                if doc.get("fit_score") is not None:
+                    match_text += f" | Fit: {doc['fit_score']:.0%}"
+                st.caption(f"Applied: {date_applied} | Job Id: {job_id}{match_text}")
+                st.code(doc.get("file_name", ""), language="text")
+            with col2:
+                st.write(f"**Status:** {emoji} {effective_status.upper()}")
+
+            # Wrap toggles + status update in a single form to reduce reload
+            with st.form(f"update_form_{doc['_id']}"):
+                # Select new status
+                current_effective_index = STATUS_OPTIONS.index(effective_status) if effective_status in STATUS_OPTIONS else 0
+                new_status = st.selectbox("Update Status", STATUS_OPTIONS, index=current_effective_index)
+
+                # Checkboxes for favorite, cold email, linkedin message
+                current_fav = doc.get("favorite", False)
+                new_fav = st.checkbox("Favorite", value=current_fav)
+
+                current_cold = doc.get("sent_cold_email", False)
+                new_cold = st.checkbox("Sent Cold Email", value=current_cold)
 
-def clear_application_cache():
-    """Helper to clear the cached list of applications after an update."""
-    st.cache_data.clear()
+                current_linked = doc.get("sent_linkedin_message", False)
+                new_linked = st.checkbox("Sent LinkedIn Message", value=current_linked)
+
+                submitted = st.form_submit_button("Save Changes")
+                if submitted:
+                    # Only update if changed
+                    if new_status != effective_status:
+                        store.update_status(doc["_id"], new_status)
+                    if new_fav != current_fav:
+                        store.toggle(doc["_id"], "favorite", new_fav)
+                    if new_cold != current_cold:
+                        store.toggle(doc["_id"], "sent_cold_email", new_cold)
+                    if new_linked != current_linked:
+                        store.toggle(doc["_id"], "sent_linkedin_message", new_linked)
+
+                    st.success("Changes saved!")
+                    st.rerun()
+
+            # Action buttons outside the form
+            colA, colB, colC = st.columns(3)
+            with colA:
+                if st.button("Show Resume Data", key=f"resume_{doc['_id']}"):
+                    st.markdown("### Resume Points")
+                    details = get_application_details(doc["_id"])
+                    render_resume(details.get("resume_content") or {})
 
-# Helper function to parse date applied
-def get_date(app):
-    date_str = app.get("date_applied", "")
-    try:
-        # If date is empty or starts with '0000', treat it as invalid
-        if not date_str or date_str.startswith("0000"):
-            raise ValueError("Invalid date with year=0 or empty string")
+            with colB:
+                if st.button("Delete Application", key=f"delete_{doc['_id']}"):
+                    store.delete(doc["_id"])
+                    unindex_application(doc["_id"])
+                    unindex_job_description(doc["_id"])
+                    st.success("Application deleted!")
+                    st.rerun()
 
-        dt = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+            with colC:
+                if st.button("Generate LinkedIn Message", key=f"linkedin_{doc['_id']}"):
+                    message = generate_linkedin_message(company, title, job_id)
+                    st.write("**LinkedIn message:**")
+                    st.code(message, language="text")
 
-        # If the parsed date is before 1970, forcibly set it to 1970-01-01
-        if dt.year < 1970:
-            dt = datetime(1970, 1, 1)
+            st.divider()
 
-        return dt
 
-    except Exception:
-        # Fallback if parsing or any other error occurs
-        return datetime(1970, 1, 1)
+def display_status(doc):
+    """The status shown for an application: the secondary status if set, else the primary one."""
+    return doc.get("secondary_status") or doc.get("primary_status", doc.get("status", "not applied"))
 
-def sort_date_newest_key(app):
-    dt = get_date(app)  # guaranteed safe for .timestamp()
-    return (-dt.timestamp(), app.get("company_name", "").lower(), app.get("title", "").lower())
 
-def sort_date_oldest_key(app):
-    dt = get_date(app)  # guaranteed safe
-    return (dt.timestamp(), app.get("company_name", "").lower(), app.get("title", "").lower())
+def render_application_grid(store, paged_apps):
+    """
+    Editable table of a page of applications. Cell edits and the bulk actions
+    for the selected rows are saved together in one bulk_write.
+    """
+    if not paged_apps:
+        return
+    rows = pd.DataFrame([{
+        "Select": False,
+        "Company": doc.get("company_name", ""),
+        "Title": doc.get("title", ""),
+        "Job Id": doc.get("job_id", "N/A"),
+        "Status": display_status(doc),
+        "Favorite": bool(doc.get("favorite", False)),
+        "Cold Email": bool(doc.get("sent_cold_email", False)),
+        "LinkedIn": bool(doc.get("sent_linkedin_message", False)),
+        "Match": doc.get("matching_score"),
+        "Fit": doc.get("fit_score"),
+        "Applied": format_date_applied(doc.get("date_applied")),
+    } for doc in paged_apps], index=[str(doc["_id"]) for doc in paged_apps])
+    docs_by_id = {str(doc["_id"]): doc for doc in paged_apps}
+
+    with st.form("grid_form"):
+        edited = st.data_editor(
+            rows,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["Company", "Title", "Job Id", "Match", "Fit", "Applied"],
+            column_config={
+                "Select": st.column_config.CheckboxColumn("Select", width="small"),
+                "Status": st.column_config.SelectboxColumn("Status", options=STATUS_OPTIONS, required=True),
+                "Match": st.column_config.NumberColumn("Match", format="%.2f"),
+                "Fit": st.column_config.NumberColumn("Fit", format="%.2f"),
+            },
+            # A new key after each save, so stale cell edits are not replayed on fresh data
+            key=f"grid_{st.session_state.current_page}_{st.session_state.get('grid_version', 0)}",
+        )
+
+        st.write("**Bulk actions for selected rows**")
+        col1, col2, col3, col4 = st.columns(4)
+        bulk_status = col1.selectbox("Set status", [NO_CHANGE] + STATUS_OPTIONS)
+        bulk_fav = col2.selectbox("Favorite", [NO_CHANGE, "Yes", "No"])
+        bulk_cold = col3.selectbox("Cold Email", [NO_CHANGE, "Yes", "No"])
+        bulk_linked = col4.selectbox("LinkedIn", [NO_CHANGE, "Yes", "No"])
+        delete_selected = st.checkbox("Delete selected applications")
+
+        if not st.form_submit_button("Apply Changes"):
+            return
+
+    changes = {}
+    delete_ids = []
+    for row_id, row in edited.iterrows():
+        doc = docs_by_id[row_id]
+        if row["Select"] and delete_selected:
+            delete_ids.append(doc["_id"])
+            continue
+        change = {}
+        status = bulk_status if row["Select"] and bulk_status != NO_CHANGE else row["Status"]
+        if status != display_status(doc):
+            change["status"] = status
+        for field, column, bulk in (("favorite", "Favorite", bulk_fav),
+                                    ("sent_cold_email", "Cold Email", bulk_cold),
+                                    ("sent_linkedin_message", "LinkedIn", bulk_linked)):
+            value = bulk == "Yes" if row["Select"] and bulk != NO_CHANGE else bool(row[column])
+            if value != bool(doc.get(field, False)):
+                change[field] = value
+        if change:
+            changes[doc["_id"]] = change
+
+    if not changes and not delete_ids:
+        st.info("No changes to save.")
+        return
+    deleted = store.bulk_write(changes, delete_ids)
+    if deleted:
+        unindex_application(*deleted)
+        unindex_job_description(*deleted)
+    st.session_state.grid_version = st.session_state.get("grid_version", 0) + 1
+    st.success(f"Saved {len(changes)} updated and {len(deleted)} deleted applications.")
+    st.rerun()
 
 
 def main():
     st.title("Job Application Tracker 📋")
+    # Reads are cached process-wide and kept up to date by the writes below
+    store = get_application_store()
 
-    # Retrieve all applications from cache
-    applications = fetch_all_applications()
-    if not applications:
+    # Metrics come from the materialized stats document (one read)
+    metrics = store.metrics()
+    if not metrics["total"]:
         st.info("No applications found. Add job applications to track them.")
         logging.info("No applications found.")
         return
 
-    # -- Build metrics (applied, not applied, interview, etc.)
-    metrics = {"applied": 0, "not applied": 0, "interview": 0, "rejected": 0, "selected": 0}
-    for app in applications:
-        primary = app.get("primary_status", app.get("status", "not applied"))
-        secondary = app.get("secondary_status", "")
-        if primary == "applied":
-            metrics["applied"] += 1
-        else:
-            metrics["not applied"] += 1
-        if secondary in metrics:
-            metrics[secondary] += 1
-
-    cold_email_not_sent = sum(1 for app in applications if not app.get("sent_cold_email", False))
-    linkedin_not_sent = sum(1 for app in applications if not app.get("sent_linkedin_message", False))
+    cold_email_not_sent = metrics["no_cold_email"]
+    linkedin_not_sent = metrics["no_linkedin"]
 
     # -- Metrics Display
     st.subheader("Application Metrics")
@@ -97,25 +249,31 @@ def main():
 
     # -- SIDEBAR FILTERS
     with st.sidebar:
+        # Grid pages hold more rows, so switching views starts again at page 0
+        view = st.radio("View", ["Cards", "Grid"], horizontal=True, key="tracker_view",
+                        on_change=lambda: st.session_state.update(current_page=0))
+        page_size = GRID_PAGE_SIZE if view == "Grid" else PAGE_SIZE
+
         st.header("Filters")
 
         # Wrap in a single form so we only rerun after pressing "Apply Filters"
         with st.form("filter_form"):
-            status_options = ["not applied", "applied", "interview", "rejected", "selected"]
             status_filter = st.multiselect(
                 "Status",
-                options=status_options,
+                options=STATUS_OPTIONS,
                 default=st.session_state.get("status_filter", [])
             )
-            companies = sorted(list(set(app.get("company_name", "") for app in applications)))
+            companies = store.company_names()
             company_filter = st.multiselect(
                 "Company",
                 options=companies,
                 default=st.session_state.get("company_filter", [])
             )
             search_query = st.text_input(
-                "Search (Role or Company)",
-                value=st.session_state.get("search_query", "")
+                "Search (company, role or job description)",
+                value=st.session_state.get("search_query", ""),
+                help="Every word must appear (whole words, stemmed). Company names and "
+                     "roles also match what they start with, e.g. \"goo\" finds Google."
             )
             favorite_filter = st.checkbox(
                 "Favorites Only",
@@ -138,7 +296,7 @@ def main():
             # date_start = st.date_input("Earliest applied date")
             # date_end = st.date_input("Latest applied date")
 
-            sort_options = ["Date (newest first)", "Date (oldest first)", "Company", "Status"]
+            sort_options = list(SORT_KEYS)
             sort_by = st.selectbox(
                 "Sort by",
                 options=sort_options,
@@ -161,155 +319,46 @@ def main():
 
                 st.rerun()
 
-    # -- APPLY FILTERS
-    filtered_apps = applications.copy()
+    # -- BUILD SERVER-SIDE QUERY
     # Load filters from session_state
     status_filter = st.session_state.get("status_filter", [])
     company_filter = st.session_state.get("company_filter", [])
-    search_query = st.session_state.get("search_query", "").lower()
+    search_query = st.session_state.get("search_query", "").strip()
     favorite_filter = st.session_state.get("favorite_filter", False)
     cold_email_not_sent_filter = st.session_state.get("cold_email_not_sent_filter", False)
     linkedin_not_sent_filter = st.session_state.get("linkedin_not_sent_filter", False)
     missing_both_filter = st.session_state.get("missing_both_filter", False)
     sort_by = st.session_state.get("sort_by", "Date (newest first)")
 
-    if status_filter:
-        filtered_apps = [
-            app for app in filtered_apps
-            if (app.get("primary_status", "not applied") in status_filter
-               or app.get("secondary_status", "") in status_filter)
-        ]
-    if company_filter:
-        filtered_apps = [app for app in filtered_apps if app.get("company_name", "") in company_filter]
-    if search_query:
-        filtered_apps = [
-            app for app in filtered_apps
-            if search_query in app.get("company_name", "").lower()
-               or search_query in app.get("title", "").lower()
-        ]
-    if favorite_filter:
-        filtered_apps = [app for app in filtered_apps if app.get("favorite", False)]
-    if cold_email_not_sent_filter:
-        filtered_apps = [app for app in filtered_apps if not app.get("sent_cold_email", False)]
-    if linkedin_not_sent_filter:
-        filtered_apps = [app for app in filtered_apps if not app.get("sent_linkedin_message", False)]
-    if missing_both_filter:
-        filtered_apps = [
-            app for app in filtered_apps
-            if not app.get("sent_cold_email", False) and not app.get("sent_linkedin_message", False)
-        ]
-
-    # Example: you could also filter by a date range if you tracked date range in session:
-    # if date_start and date_end:
-    #     filtered_apps = [
-    #         app for app in filtered_apps
-    #         if date_start <= get_date(app).date() <= date_end
-    #     ]
-
-    # -- APPLY SORTING
-    if sort_by == "Date (newest first)":
-        filtered_apps.sort(key=sort_date_newest_key)
-    elif sort_by == "Date (oldest first)":
-        filtered_apps.sort(key=sort_date_oldest_key)
-    elif sort_by == "Company":
-        filtered_apps.sort(key=lambda app: (app.get("company_name", "").lower(), get_date(app)))
-    elif sort_by == "Status":
-        filtered_apps.sort(key=lambda app: app.get("primary_status", "not applied"))
-
-    # -- PAGINATION (LOCAL)
-    PAGE_SIZE = 10
+    query = build_applications_query(
+        status=status_filter,
+        companies=company_filter,
+        search=search_query,
+        favorite_only=favorite_filter,
+        no_cold_email=cold_email_not_sent_filter or missing_both_filter,
+        no_linkedin=linkedin_not_sent_filter or missing_both_filter,
+    )
+
+    # -- PAGINATION (SERVER-SIDE)
     if "current_page" not in st.session_state:
         st.session_state.current_page = 0
 
-    total_apps = len(filtered_apps)
-    start_index = st.session_state.current_page * PAGE_SIZE
-    end_index = start_index + PAGE_SIZE
-    paged_apps = filtered_apps[start_index:end_index]
+    total_apps = store.count(query)
+    end_index = (st.session_state.current_page + 1) * page_size
+    if SORT_KEYS[sort_by] == "fit":
+        # Ranked in memory by the TF-IDF index, so not served from the page cache
+        paged_apps = rank_applications_by_fit(get_base_resume() or {}, query,
+                                              st.session_state.current_page, page_size)
+    else:
+        paged_apps = store.get_page(query, SORT_KEYS[sort_by], st.session_state.current_page, page_size)
 
     st.write(f"**Displaying {len(paged_apps)} of {total_apps} filtered applications.**")
 
     # -- DISPLAY APPLICATIONS
-    status_emojis = {
-        "not applied": "🟠",
-        "applied": "🟢",
-        "interview": "🔵",
-        "rejected": "🔴",
-        "selected": "🟢"
-    }
-
-    for doc in paged_apps:
-        company = doc.get('company_name', '')
-        title = doc.get('title', '')
-        job_id = doc.get('job_id', 'N/A')
-        date_applied = doc.get('date_applied', 'N/A')
-        primary_status = doc.get("primary_status", doc.get("status", "not applied"))
-        secondary_status = doc.get("secondary_status", "")
-        effective_status = secondary_status if secondary_status else primary_status
-        emoji = status_emojis.get(effective_status, "⚪")
-
-        with st.container():
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.subheader(f"{company} - {title}")
-                st.caption(f"Applied: {date_applied} | Job Id: {job_id}")
-                st.code(doc.get("file_name", ""), language="text")
-            with col2:
-                st.write(f"**Status:** {emoji} {effective_status.upper()}")
-
-            # Wrap toggles + status update in a single form to reduce reload
-            with st.form(f"update_form_{doc['_id']}"):
-                # Select new status
-                options = ["not applied", "applied", "interview", "rejected", "selected"]
-                current_effective_index = options.index(effective_status) if effective_status in options else 0
-                new_status = st.selectbox("Update Status", options, index=current_effective_index)
-
-                # Checkboxes for favorite, cold email, linkedin message
-                current_fav = doc.get("favorite", False)
-                new_fav = st.checkbox("Favorite", value=current_fav)
-
-                current_cold = doc.get("sent_cold_email", False)
-                new_cold = st.checkbox("Sent Cold Email", value=current_cold)
-
-                current_linked = doc.get("sent_linkedin_message", False)
-                new_linked = st.checkbox("Sent LinkedIn Message", value=current_linked)
-
-                submitted = st.form_submit_button("Save Changes")
-                if submitted:
-                    # Only update if changed
-                    if new_status != effective_status:
-                        update_application_status(doc["_id"], new_status)
-                    if new_fav != current_fav:
-                        update_application_toggle(doc["_id"], "favorite", new_fav)
-                    if new_cold != current_cold:
-                        update_application_toggle(doc["_id"], "sent_cold_email", new_cold)
-                    if new_linked != current_linked:
-                        update_application_toggle(doc["_id"], "sent_linkedin_message", new_linked)
-
-                    clear_application_cache()
-                    st.success("Changes saved!")
-                    st.rerun()
-
-            # Action buttons outside the form
-            colA, colB, colC = st.columns(3)
-            with colA:
-                if st.button("Show Resume Data", key=f"resume_{doc['_id']}"):
-                    st.markdown("### Resume Points")
-                    render_resume(doc.get("resume_content", {}))
-
-            with colB:
-                if st.button("Delete Application", key=f"delete_{doc['_id']}"):
-                    delete_application(doc["_id"])
-                    clear_application_cache()
-                    st.success("Application deleted!")
-                    st.rerun()
-
-            with colC:
-                if st.button("Generate LinkedIn Message", key=f"linkedin_{doc['_id']}"):
-                    message = generate_linkedin_message(company, title, job_id)
-                    st.write("**LinkedIn message:**")
-                    st.code(message, language="text")
-
-            st.divider()
+    if view == "Grid":
+        render_application_grid(store, paged_apps)
+    else:
+        render_application_cards(store, paged_apps)
 
     # PAGINATION BUTTONS
     pagination_col1, pagination_col2 = st.columns([1, 1])
@@ -1,55 +1,33 @@
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+import json
 import logging
+from utils.normalization import clean_text
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 logging.info("Loading prompt_engineering module.")
 
-# Download NLTK resources once at module startup
-nltk.download('punkt', quiet=True)
-# Added to download the missing resource
-nltk.download('punkt_tab', quiet=True)
-nltk.download('stopwords', quiet=True)
-
-# Load stopwords only once
-STOP_WORDS = set(stopwords.words('english'))
-logging.info("Stopwords loaded.")
 
+# Output requirements appended to the system prompt for each output format
+OUTPUT_REQUIREMENTS = {
+    "resume": """8. Output Requirements
+   - Return only a valid JSON object that follows the original resume's structure (keys, arrays, etc.).
+   - Do not include any text or explanation outside the JSON.
+   - The final resume must include ALL required keywords while maintaining a professional, authentic tone.
+""",
+    "patch": """8. Output Requirements
+   - Return only a JSON array of JSON Patch operations ("replace", "add", "remove") against the original resume.
+   - Only include operations for values you change; never echo unchanged content.
+   - Do not include any text or explanation outside the JSON.
+   - The patched resume must include ALL required keywords while maintaining a professional, authentic tone.
+""",
+}
 
-def clean_text(text):
-    """
-    Clean and normalize text using NLTK:
-    1. Convert to lowercase
-    2. Remove special characters and extra whitespace
-    3. Remove excessive stopwords while preserving meaning
-    4. Return cleaned text
-    """
-    if not text:
-        return ""
 
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    word_tokens = word_tokenize(text)
-    filtered_text = []
-    prev_word = ""
-    for word in word_tokens:
-        if word not in STOP_WORDS or prev_word not in STOP_WORDS:
-            filtered_text.append(word)
-        prev_word = word
-    cleaned_text = ' '.join(filtered_text)
-    cleaned_text = '. '.join(s.capitalize() for s in cleaned_text.split('. '))
-    logging.info("Cleaned text: %s", cleaned_text)
-    return cleaned_text
-
-
-def get_system_prompt():
+def get_system_prompt(output_format="resume"):
     """
     Returns the system prompt instructing the LLM to act as a professional resume writer
     and incorporate the provided keywords into bullet points or coursework, if relevant.
+    output_format is "resume" (full JSON resume) or "patch" (JSON Patch operations).
     """
 
     prompt = """
@@ -91,21 +69,33 @@ You are a professional resume writer, skilled in weaving keywords naturally into
    - Keep the language concise, professional, and free of special characters.
    - Use correct grammar and punctuation. End each bullet with a period.
 
-8. Output Requirements
-   - Return only a valid JSON object that follows the original resume's structure (keys, arrays, etc.).
-   - Do not include any text or explanation outside the JSON.
-   - The final resume must include ALL required keywords while maintaining a professional, authentic tone.
-
+{output_requirements}
 Adhere to these guidelines to produce a refined, ATS-friendly, and highly relevant resume.
 """
-    return prompt
+    return prompt.format(output_requirements=OUTPUT_REQUIREMENTS[output_format])
 
 
+def format_action_verbs(action_verbs):
+    """Format {category: [verbs]} as the action-verb block of the user prompt."""
+    return "".join(f"- {category}: {' '.join(verbs)}\n" for category, verbs in action_verbs.items())
+
+
+def format_additional_instructions(additional_instructions):
+    """The cleaned "Additional Instructions" block of a user prompt, or "" if there are none."""
+    if not additional_instructions:
+        return ""
+    return f"### Additional Instructions\n{clean_text(additional_instructions)}\n\n"
+
+
+# User prompts are laid out so everything that is the same for every job
+# (instructions, action verbs, the base resume) comes first and job-specific
+# content (additional instructions, job description, keywords) comes last.
+# The system prompt plus that stable block is then a byte-identical prefix
+# across requests, which DeepSeek context caching and OpenAI prompt caching
+# can serve from cache.
 
-def get_user_prompt(job_description, resume_json, action_verbs, additional_instructions, keywords):
-    cleaned_job_description = clean_text(job_description)
-    cleaned_instructions = clean_text(additional_instructions) if additional_instructions else ""
 
+def get_user_prompt(job_description, resume_json, action_verbs, additional_instructions, keywords):
     prompt = f"""
 Below are the instructions, a list of action verbs,  candidate's original resume (in JSON), a job description, and a list of keywords.
 
@@ -154,9 +144,9 @@ Now, provide the final updated JSON resume incorporating all these instructions.
 {action_verbs}
 
 ### Candidate's Resume (JSON)
-{resume_json}
+{json.dumps(resume_json, indent=2)}
 
-### Job Description
+{format_additional_instructions(additional_instructions)}### Job Description
 {job_description}
 
 ### Keywords (ALL MUST be integrated)
@@ -164,3 +154,106 @@ Now, provide the final updated JSON resume incorporating all these instructions.
 """
     return prompt
 
+
+# Section-specific rules for get_section_user_prompt()
+SECTION_INSTRUCTIONS = {
+    "experience": """- REWRITE the experience bullet points to embed the keywords below directly in context.
+   - Each job experience should incorporate at least 2-3 of the keywords.
+   - Limit the experience section to 6 bullet points total.""",
+    "projects": """- REWRITE the project bullet points to embed the keywords below directly in context.
+   - Limit the projects section to 3 bullet points total.""",
+    "skills": """- PRESERVE ALL existing skills. You may reorganize them into subcategories but do not remove any.
+   - Add a keyword to skills ONLY IF it is a specific tool, language, or technology not already listed.
+   - Include ONLY coursework that is relevant to the job description requirements.""",
+}
+
+
+def get_section_user_prompt(section, section_json, job_description, action_verbs, additional_instructions, keywords):
+    """
+    User prompt for tailoring one part of the resume on its own, so several
+    sections can be generated concurrently.
+    """
+    prompt = f"""
+Below is ONE part of a candidate's resume (in JSON), a list of action verbs, a job description, and the keywords assigned to this part.
+
+### Instructions
+
+1. **Tailor This Part Only**
+   {SECTION_INSTRUCTIONS[section]}
+   - Do not use buzzwords, jargon, or repetitive language.
+
+2. **STAR + Action Verbs**
+   - Apply the STAR method implicitly in each rewritten bullet.
+   - Use a unique action verb from the provided list to start each bullet.
+
+3. **Quantifying Metrics**
+   - If a bullet already has a metric, do not modify it.
+   - If a bullet lacks any metric and you can accurately infer one from the candidate's background, add one metric.
+
+4. **Output Format**
+   - Return only a valid JSON object with exactly the same top-level keys as the resume part below.
+   - Do not include any commentary or text outside the JSON.
+
+### Action Verbs (start each bullet with one)
+{action_verbs}
+
+### Resume Part (JSON)
+{json.dumps(section_json, indent=2)}
+
+{format_additional_instructions(additional_instructions)}### Job Description
+{job_description}
+
+### Keywords for This Part
+{keywords}
+"""
+    return prompt
+
+
+def get_patch_user_prompt(job_description, patch_targets, action_verbs, additional_instructions, keywords):
+    """
+    User prompt asking for a JSON Patch against the resume instead of the whole
+    resume. patch_targets is the pointer listing from utils.resume_patch.list_patch_targets().
+    """
+    prompt = f"""
+Below are the instructions, a list of action verbs, the candidate's resume content addressed by JSON Pointer, a job description, and a list of keywords.
+
+### Instructions
+
+1. **REWRITE Bullet Points to Incorporate Keywords**
+   - Rewrite existing bullet points to embed keywords directly in experience/project descriptions.
+   - At least 60% of the keywords must appear within experience/project bullet points.
+   - Each job experience should incorporate at least 2-3 keywords from the provided list.
+
+2. **Bullet Point Limits**
+   - Limit the experience section to 6 bullet points total and the projects section to 3 bullet points total.
+   - Remove less impactful bullets to stay within the limits.
+
+3. **Coursework and Skills**
+   - Do not remove any skills. Only extend a skills line with keywords that cannot fit in a bullet point.
+   - Remove coursework that is not relevant to the job description.
+
+4. **STAR + Action Verbs + Metrics**
+   - Apply the STAR method implicitly and start each bullet with a unique action verb from the list.
+   - Keep existing metrics unchanged; add one only if it can be accurately inferred.
+
+5. **Output Format: JSON Patch**
+   - Return ONLY a JSON array of operations. Every path refers to the ORIGINAL listing below.
+   - Rewrite a value: {{"op": "replace", "path": "/experience/0/points/1", "value": "New bullet text."}}
+   - Add a bullet: {{"op": "add", "path": "/projects/0/points/-", "value": "New bullet text."}}
+   - Drop a bullet or course: {{"op": "remove", "path": "/experience/1/points/4"}}
+   - Skills lines are replaced whole: {{"op": "replace", "path": "/skills/0/content", "value": "Python, Go, Kafka"}}
+   - Omit anything you leave unchanged.
+
+### Action Verbs (start each bullet with one)
+{action_verbs}
+
+### Resume Content (JSON Pointer: text)
+{patch_targets}
+
+{format_additional_instructions(additional_instructions)}### Job Description
+{job_description}
+
+### Keywords (ALL MUST be integrated)
+{keywords}
+"""
+    return prompt
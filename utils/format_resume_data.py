@@ -16,22 +16,28 @@ def render_work_experience(experience):
     logging.info("Rendering work experience, total jobs: %d", len(experience))
     st.write("## Work Experience")
     for job in experience:
-        header = f"### {job.get('company', 'Unknown Company')}"
-        st.write(header)
-        # Aggregate bullet points into a single string with dashes
-        points = "\n".join([f"- {point}" for point in job.get('points', [])])
-        st.code(points, language="text")
+        render_experience_entry(job)
     logging.info("Work experience rendered.")
+
+def render_experience_entry(job):
+    header = f"### {job.get('company', 'Unknown Company')}"
+    st.write(header)
+    # Aggregate bullet points into a single string with dashes
+    points = "\n".join([f"- {point}" for point in job.get('points', [])])
+    st.code(points, language="text")
             
 def render_projects(projects):
     logging.info("Rendering projects, total projects: %d", len(projects))
     st.write("## Projects")
     for project in projects:
-        header = f"### {project.get('title', 'Untitled Project')}"
-        st.write(header)
-        points = "\n".join([f"- {point}" for point in project.get('points', [])])
-        st.code(points, language="text")
+        render_project_entry(project)
     logging.info("Projects rendered.")
+
+def render_project_entry(project):
+    header = f"### {project.get('title', 'Untitled Project')}"
+    st.write(header)
+    points = "\n".join([f"- {point}" for point in project.get('points', [])])
+    st.code(points, language="text")
             
 def render_skills(skills):
     logging.info("Rendering skills, total categories: %d", len(skills))
@@ -57,3 +63,47 @@ def render_resume(resume_data):
     render_skills(skills)
     render_projects(projects)
     logging.info("Full resume rendered.")
+
+
+class ProgressiveResumeRenderer:
+    """
+    Renders a streamed resume section by section, in the same layout as
+    render_resume(), from IncrementalSectionParser events.
+    """
+    SECTION_ORDER = ("coursework", "experience", "skills", "projects")
+    ENTRY_RENDERERS = {
+        "experience": ("## Work Experience", render_experience_entry),
+        "projects": ("## Projects", render_project_entry),
+    }
+
+    def __init__(self):
+        # Reserve a slot per section so they appear in order whatever arrives first
+        self.containers = {key: st.container() for key in self.SECTION_ORDER}
+        self.entries_rendered = dict.fromkeys(self.SECTION_ORDER, 0)
+        self.rendered_any = False
+
+    def handle(self, event):
+        kind, key = event[0], event[1]
+        if key not in self.containers:
+            return
+        with self.containers[key]:
+            if kind == "item" and key in self.ENTRY_RENDERERS:
+                self._render_entries(key, [event[3]])
+            elif kind == "section":
+                value = event[2]
+                if key == "coursework":
+                    render_coursework(value)
+                elif key == "skills":
+                    render_skills(value)
+                else:
+                    # Entries that were not streamed individually
+                    self._render_entries(key, value[self.entries_rendered[key]:])
+        self.rendered_any = True
+
+    def _render_entries(self, key, entries):
+        header, render_entry = self.ENTRY_RENDERERS[key]
+        for entry in entries:
+            if self.entries_rendered[key] == 0:
+                st.write(header)
+            render_entry(entry)
+            self.entries_rendered[key] += 1
@@ -15,4 +15,13 @@ def sanitize_filename(company, title, job_id):
     # The regex below replaces spaces, commas, hyphens, and parentheses with underscores.
     sanitized_file_name = re.sub(r"[\s,\-\(\)]+", "_", temp_file_name)
     logging.info("Sanitized filename: %s", sanitized_file_name)
-    return sanitized_file_name.lower()
\ No newline at end of file
+    return sanitized_file_name.lower()
+
+def format_keywords(keywords):
+    """Parse keywords with multiple delimiters into a sorted, de-duplicated list"""
+    if not keywords:
+        return []
+    split_pattern = r'[,\n;]'
+    keywords = re.split(split_pattern, keywords)
+    cleaned = [kw.strip().lower() for kw in keywords if kw.strip()]
+    return sorted(set(cleaned))
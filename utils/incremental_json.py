@@ -0,0 +1,110 @@
+import json
+import logging
+
+
+class IncrementalSectionParser:
+    """
+    Incremental parser for a streamed JSON object (e.g. an LLM completion).
+
+    Text is fed in arbitrary chunks. Anything before the first "{" (such as a
+    ```json fence) is skipped. feed() returns the events completed by the chunk:
+
+    - ("item", key, index, value) for each object/array element of a top-level
+      array, as soon as that element closes (e.g. one experience entry).
+    - ("section", key, value) when a top-level value closes.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.started = False
+        self.done = False
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.expect = "key"
+        self.current_key = None
+        self.value_start = None
+        self.value_is_array = False
+        self.item_start = None
+        self.item_index = 0
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the list of completed events."""
+        events = []
+        if self.done or not chunk:
+            return events
+        self.text += chunk
+        text = self.text
+        i = self.pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expect == "key":
+                        self.current_key = json.loads(text[self.string_start:i + 1])
+                        self.expect = "colon"
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = i
+                if self.depth == 1 and self.expect == "value" and self.value_start is None:
+                    self.value_start = i
+            elif ch in "{[":
+                if self.depth == 1 and self.expect == "value" and self.value_start is None:
+                    self.value_start = i
+                    self.value_is_array = ch == "["
+                    self.item_index = 0
+                elif self.depth == 2 and self.value_is_array:
+                    self.item_start = i
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 2 and self.value_is_array and self.item_start is not None:
+                    self._emit(events, "item", text[self.item_start:i + 1])
+                    self.item_start = None
+                    self.item_index += 1
+                elif self.depth == 1 and self.value_start is not None:
+                    self._emit(events, "section", text[self.value_start:i + 1])
+                    self.value_start = None
+                elif self.depth == 0:
+                    self._finish_scalar(events, text, i)
+                    self.done = True
+            elif self.depth == 1:
+                if ch == ":" and self.expect == "colon":
+                    self.expect = "value"
+                elif ch == ",":
+                    self._finish_scalar(events, text, i)
+                    self.expect = "key"
+                    self.value_is_array = False
+                elif not ch.isspace() and self.expect == "value" and self.value_start is None:
+                    self.value_start = i
+            i += 1
+        self.pos = i
+        return events
+
+    def _finish_scalar(self, events, text, end):
+        # Numbers, booleans and null have no closing delimiter of their own
+        if self.value_start is not None:
+            self._emit(events, "section", text[self.value_start:end].strip())
+            self.value_start = None
+
+    def _emit(self, events, kind, raw):
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logging.warning("Skipping unparseable streamed %s for key %s", kind, self.current_key)
+            return
+        if kind == "item":
+            events.append(("item", self.current_key, self.item_index, value))
+        else:
+            events.append(("section", self.current_key, value))
@@ -0,0 +1,135 @@
+import functools
+import logging
+import re
+from collections import deque
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_keyword(keyword):
+    return _WHITESPACE.sub(" ", keyword.strip().lower())
+
+
+def plural_variants(keyword):
+    """Singular/plural surface forms of a keyword (only the last word is inflected)."""
+    variants = {keyword}
+    if not keyword[-1:].isalpha():
+        return variants
+    if keyword.endswith("ies") and len(keyword) > 4:
+        variants.add(keyword[:-3] + "y")
+    elif keyword.endswith("es") and keyword[-3:-2] in ("s", "x", "z", "h"):
+        # "classes" -> "class", but "databases" -> "database"
+        variants.update((keyword[:-2], keyword[:-1]))
+    elif keyword.endswith("s") and not keyword.endswith("ss") and len(keyword) > 3:
+        variants.add(keyword[:-1])
+    else:
+        if keyword.endswith("y") and keyword[-2:-1] not in "aeiou":
+            variants.add(keyword[:-1] + "ies")
+        elif keyword.endswith(("s", "x", "z", "ch", "sh")):
+            variants.add(keyword + "es")
+        else:
+            variants.add(keyword + "s")
+    return variants
+
+
+def iter_resume_text(resume):
+    """
+    Yield (location, text) for the tailorable text of a resume: coursework
+    entries, experience/project bullets and skills lines. Locations are
+    ("coursework", i), ("experience", job, bullet), ("projects", project, bullet)
+    and ("skills", i).
+    """
+    if not isinstance(resume, dict):
+        return
+    for index, course in enumerate(resume.get("coursework", []) or []):
+        yield ("coursework", index), str(course)
+    for section in ("experience", "projects"):
+        for entry_index, entry in enumerate(resume.get(section, []) or []):
+            if not isinstance(entry, dict):
+                continue
+            for point_index, point in enumerate(entry.get("points", []) or []):
+                yield (section, entry_index, point_index), str(point)
+    for index, category in enumerate(resume.get("skills", []) or []):
+        if isinstance(category, dict):
+            yield ("skills", index), f"{category.get('label', '')}: {category.get('content', '')}"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed keyword set. One linear pass over each
+    text finds every keyword occurrence; matches must sit on word boundaries,
+    so "go" does not match inside "google".
+    """
+
+    def __init__(self, keywords, plural_aware=True):
+        self.keywords = list(dict.fromkeys(normalize_keyword(kw) for kw in keywords if kw.strip()))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for keyword in self.keywords:
+            forms = plural_variants(keyword) if plural_aware else {keyword}
+            for form in forms:
+                self._add(form, keyword)
+        self._build_failure_links()
+
+    def _add(self, pattern, keyword):
+        node = 0
+        for ch in pattern:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), keyword))
+
+    def _build_failure_links(self):
+        # Depth-1 nodes fail to the root; deeper nodes follow their parent's links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_in_text(self, text):
+        """Return the set of keywords that occur in `text` on word boundaries."""
+        text = _WHITESPACE.sub(" ", text.lower())
+        found = set()
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, keyword in self._output[node]:
+                start = end - length + 1
+                before = text[start - 1] if start > 0 else " "
+                after = text[end + 1] if end + 1 < len(text) else " "
+                if not before.isalnum() and not after.isalnum():
+                    found.add(keyword)
+        return found
+
+    def locate(self, resume):
+        """Map each keyword to the resume locations (see iter_resume_text) where it appears."""
+        locations = {keyword: [] for keyword in self.keywords}
+        for location, text in iter_resume_text(resume):
+            for keyword in self.find_in_text(text):
+                locations[keyword].append(location)
+        return locations
+
+    def covered(self, resume):
+        """Return the set of keywords that appear anywhere in the resume's tailorable text."""
+        return {keyword for keyword, found in self.locate(resume).items() if found}
+
+
+@functools.lru_cache(maxsize=64)
+def get_keyword_matcher(keywords, plural_aware=True):
+    """Build (once per keyword set) and return a KeywordMatcher. `keywords` must be a tuple."""
+    logging.info("Building keyword matcher for %d keywords.", len(keywords))
+    return KeywordMatcher(keywords, plural_aware=plural_aware)
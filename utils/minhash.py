@@ -0,0 +1,114 @@
+import logging
+import threading
+import zlib
+import numpy as np
+from utils.normalization import tokenize
+from utils.persistence import PersistentIndex
+
+# 128 MinHash values split into 16 LSH bands of 8 rows: two descriptions become
+# candidates with probability ~50% at Jaccard 0.7 and >99.9% at 0.9
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3
+
+# Universal hashing h(x) = (a * x + b) mod p over 31-bit values, so products fit in uint64
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(text):
+    """Set of SHINGLE_SIZE-word shingles of the normalized text (the whole text if shorter)."""
+    words = tokenize(text or "")
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text):
+    """NUM_PERM-value MinHash signature (uint32 array) of a text's word shingles."""
+    hashed = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)), dtype=np.uint64)
+    if hashed.size == 0:
+        return np.full(NUM_PERM, (1 << 31) - 1, dtype=np.uint32)
+    hashed %= _MERSENNE_PRIME
+    permuted = (np.outer(hashed, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def signature_to_bytes(signature):
+    """Pack a signature for storage: NUM_PERM * 4 bytes instead of a BSON int array."""
+    return np.asarray(signature, dtype=np.uint32).tobytes()
+
+
+def signature_from_stored(value):
+    """Signature from a stored value, packed (bytes) or an older int list."""
+    if isinstance(value, (bytes, bytearray)):
+        return np.frombuffer(bytes(value), dtype=np.uint32)
+    return np.asarray(value, dtype=np.uint32)
+
+
+def estimated_similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures: the share of equal MinHash values."""
+    return float(np.count_nonzero(np.asarray(signature) == np.asarray(other))) / NUM_PERM
+
+
+class MinHashLSHIndex(PersistentIndex):
+    """
+    LSH index of job description signatures. Each signature is cut into
+    LSH_BANDS bands; descriptions sharing any band are candidates, which are
+    then checked against the full signature. A lookup is LSH_BANDS dict
+    probes plus one comparison per candidate, whatever the collection size.
+    """
+    LABEL = "MinHash LSH index"
+
+    def __init__(self):
+        self._signatures = {}
+        self._buckets = [{} for _ in range(LSH_BANDS)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    @staticmethod
+    def _band_keys(signature):
+        signature = np.asarray(signature, dtype=np.uint32)
+        return [signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes() for band in range(LSH_BANDS)]
+
+    def add(self, doc_id, signature):
+        """Index one signature. Re-adding an existing doc_id replaces it."""
+        doc_id = str(doc_id)
+        signature = np.asarray(signature, dtype=np.uint32)
+        with self._lock:
+            self._remove(doc_id)
+            self._signatures[doc_id] = signature
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(key, set()).add(doc_id)
+
+    def _remove(self, doc_id):
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del buckets[key]
+
+    def remove(self, doc_id):
+        """Drop a signature from the index, if present."""
+        with self._lock:
+            self._remove(str(doc_id))
+
+    def query(self, signature, threshold):
+        """Return [(doc_id, similarity)] with estimated similarity >= threshold, most similar first."""
+        with self._lock:
+            candidates = set()
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(key, ()))
+            scored = [(doc_id, estimated_similarity(signature, self._signatures[doc_id]))
+                      for doc_id in candidates]
+        return sorted(((doc_id, score) for doc_id, score in scored if score >= threshold),
+                      key=lambda item: item[1], reverse=True)
@@ -0,0 +1,55 @@
+"""
+Local NLTK data for text normalization.
+
+The app never downloads NLTK data at runtime; it reads it from a bundled
+directory (data/nltk_data, or $NLTK_DATA_DIR). Populate it once, e.g. while
+building the image or the devcontainer:
+
+    python -m utils.nltk_resources
+"""
+import logging
+import os
+import threading
+
+NLTK_DATA_DIR = os.environ.get(
+    "NLTK_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "nltk_data"),
+)
+
+# Corpora used by utils.normalization (stopword thinning and lemmatization)
+REQUIRED_RESOURCES = ("stopwords", "wordnet", "omw-1.4")
+
+_configured = False
+_lock = threading.Lock()
+
+
+def configure_nltk():
+    """Import nltk on first use and put the bundled data directory first on its search path."""
+    global _configured
+    import nltk
+    if not _configured:
+        with _lock:
+            if not _configured:
+                if NLTK_DATA_DIR not in nltk.data.path:
+                    nltk.data.path.insert(0, NLTK_DATA_DIR)
+                _configured = True
+    return nltk
+
+
+def download_nltk_data(resources=REQUIRED_RESOURCES, download_dir=NLTK_DATA_DIR):
+    """Download `resources` into the bundled data directory. Returns True if all succeeded."""
+    nltk = configure_nltk()
+    os.makedirs(download_dir, exist_ok=True)
+    ok = True
+    for resource in resources:
+        if nltk.download(resource, download_dir=download_dir, quiet=True):
+            logging.info("NLTK resource %s is available in %s", resource, download_dir)
+        else:
+            logging.error("Could not download NLTK resource %s", resource)
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    raise SystemExit(0 if download_nltk_data() else 1)
@@ -0,0 +1,104 @@
+import functools
+import logging
+import re
+from utils.nltk_resources import NLTK_DATA_DIR, configure_nltk
+
+# Shared text normalization for prompt cleaning (clean_text) and match scoring
+# (preprocess_text). Both start from one cached lowercase/punctuation/whitespace
+# pass over the text and only differ in what they do with the tokens.
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_ALNUM_RUN = re.compile(r"[a-z0-9]+")
+
+# Punctuation-free contractions that nltk's word_tokenize splits in two; kept
+# so clean_text output stays identical to the word_tokenize-based original
+SPLIT_CONTRACTIONS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+
+# Bounded so a long-running Streamlit process cannot grow them without limit
+TOKEN_CACHE_SIZE = 256
+LEMMA_CACHE_SIZE = 50000
+
+
+@functools.lru_cache(maxsize=1)
+def get_stop_words():
+    """English stopwords from the local NLTK data; empty (no thinning) if it is missing."""
+    configure_nltk()
+    from nltk.corpus import stopwords
+    try:
+        return frozenset(stopwords.words("english"))
+    except LookupError:
+        logging.error("NLTK stopwords not found in %s; run `python -m utils.nltk_resources`.", NLTK_DATA_DIR)
+        return frozenset()
+
+
+@functools.lru_cache(maxsize=1)
+def get_lemmatizer():
+    """WordNet lemmatizer from the local NLTK data, or None (tokens kept as-is) if it is missing."""
+    configure_nltk()
+    from nltk.corpus import wordnet
+    from nltk.stem import WordNetLemmatizer
+    try:
+        wordnet.ensure_loaded()
+    except LookupError:
+        logging.error("NLTK wordnet not found in %s; run `python -m utils.nltk_resources`.", NLTK_DATA_DIR)
+        return None
+    return WordNetLemmatizer()
+
+
+@functools.lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def tokenize(text):
+    """
+    Lowercase, strip punctuation and split on whitespace, once per distinct text.
+    Punctuation is already gone, so a whitespace split gives the same tokens as
+    nltk's word_tokenize (apart from SPLIT_CONTRACTIONS) without loading punkt.
+    """
+    return tuple(_NON_WORD.sub(" ", text.lower()).split())
+
+
+@functools.lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize_token(token):
+    lemmatizer = get_lemmatizer()
+    return lemmatizer.lemmatize(token) if lemmatizer is not None else token
+
+
+def clean_tokens(text):
+    """Tokens for prompt cleaning: drop a stopword only when it follows another stopword."""
+    stop_words = get_stop_words()
+    filtered = []
+    prev_word = ""
+    words = (part for token in tokenize(text) for part in SPLIT_CONTRACTIONS.get(token, (token,)))
+    for word in words:
+        if word not in stop_words or prev_word not in stop_words:
+            filtered.append(word)
+        prev_word = word
+    return filtered
+
+
+def scoring_tokens(text):
+    """Tokens for match scoring: ASCII alphanumeric runs, lemmatized."""
+    return [lemmatize_token(part) for token in tokenize(text) for part in _ALNUM_RUN.findall(token)]
+
+
+def clean_text(text):
+    """Lowercased, punctuation-free text with runs of stopwords thinned out."""
+    if not text:
+        return ""
+    cleaned = " ".join(clean_tokens(text)).capitalize()
+    logging.debug("Cleaned text (%d chars).", len(cleaned))
+    return cleaned
+
+
+def preprocess_text(text):
+    """Lowercased, alphanumeric-only, lemmatized text for TF-IDF scoring."""
+    if not text:
+        return ""
+    preprocessed = " ".join(scoring_tokens(text))
+    logging.debug("Preprocessed text (%d chars).", len(preprocessed))
+    return preprocessed
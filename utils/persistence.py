@@ -0,0 +1,129 @@
+"""
+Saving the in-memory indexes (TF-IDF, MinHash LSH) to disk.
+
+Inserts and deletes update an index in memory; its file is re-written
+INDEX_SAVE_DELAY_SECONDS after the last change (and at exit) rather than on
+every write. Each index file has a single writer: the app process. Other
+processes that insert (the batch CLI) save their own copy at exit, replacing
+the file, so rebuild the index (`python -m db.maintenance rebuild-tfidf` /
+`rebuild-duplicates`) after using them side by side.
+"""
+import atexit
+import logging
+import os
+import pickle
+import tempfile
+import threading
+
+# Default for the INDEX_SAVE_DELAY_SECONDS secret
+INDEX_SAVE_DELAY_SECONDS = 10
+
+
+def get_save_delay():
+    """
+    The INDEX_SAVE_DELAY_SECONDS secret. Streamlit is imported here, on first
+    use, so the index classes (and the benchmarks using them) import without it.
+    """
+    import streamlit as st
+    return float(st.secrets.get("INDEX_SAVE_DELAY_SECONDS", INDEX_SAVE_DELAY_SECONDS))
+
+
+def atomic_pickle(obj, path, lock):
+    """
+    Pickle `obj` to `path` through a temp file of its own in the same
+    directory, then rename it into place, so concurrent savers never share or
+    rename each other's half-written file. `lock` guards obj while pickling.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=os.path.basename(path) + ".",
+                                     suffix=".tmp", delete=False) as f:
+        tmp_path = f.name
+        try:
+            with lock:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+def load_pickle(path):
+    """Unpickle the object saved at `path`, or return None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class PersistentIndex:
+    """
+    Base for the in-memory indexes: `self._lock` guards their state, is left
+    out when pickling and re-created on load. Subclasses set LABEL for logs.
+    """
+    LABEL = "index"
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def save(self, path):
+        """Atomically write the index to `path`."""
+        atomic_pickle(self, path, self._lock)
+        logging.info("Saved %s with %d documents to %s", self.LABEL, len(self), path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save(), or return None if it does not exist."""
+        index = load_pickle(path)
+        if index is not None:
+            logging.info("Loaded %s with %d documents from %s", cls.LABEL, len(index), path)
+        return index
+
+
+class DebouncedSaver:
+    """
+    Coalesces saves of an in-memory index: schedule() saves `delay` seconds
+    after the last change instead of re-writing the whole file on every
+    insert or delete, and pending changes are flushed at interpreter exit.
+    """
+
+    def __init__(self, save, delay=None):
+        self._save = save
+        self.delay = get_save_delay() if delay is None else delay
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        """Drop a pending save (e.g. after a full rebuild that saved already)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def flush(self):
+        """Save now if a save is pending."""
+        with self._lock:
+            if self._timer is None:
+                return
+            self._timer.cancel()
+            self._timer = None
+        try:
+            self._save()
+        except Exception:
+            logging.exception("Could not save index")
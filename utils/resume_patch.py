@@ -0,0 +1,153 @@
+import copy
+import logging
+
+# Top-level resume keys a patch may touch; everything else (education,
+# contact info, ...) is never sent back by the model.
+PATCHABLE_SECTIONS = ("coursework", "experience", "projects", "skills")
+PATCH_OPS = ("replace", "add", "remove")
+
+
+def _iter_patch_targets(resume):
+    """
+    Yield ("value", pointer, text) for every value a patch may replace or
+    remove, and ("list", pointer, header) for every list it may add to.
+    """
+    yield "list", "/coursework", None
+    for index, course in enumerate(resume.get("coursework", [])):
+        yield "value", f"/coursework/{index}", course
+    for section, label in (("experience", "company"), ("projects", "title")):
+        for entry_index, entry in enumerate(resume.get(section, [])):
+            yield "list", f"/{section}/{entry_index}/points", f"# /{section}/{entry_index} ({entry.get(label, '')})"
+            for point_index, point in enumerate(entry.get("points", [])):
+                yield "value", f"/{section}/{entry_index}/points/{point_index}", point
+    for index, category in enumerate(resume.get("skills", [])):
+        yield "value", f"/skills/{index}/content", f"({category.get('label', '')}) {category.get('content', '')}"
+
+
+def list_patch_targets(resume):
+    """
+    Return "pointer: text" lines for every patchable value in the resume, so
+    the model can address bullets by JSON Pointer without echoing the resume.
+    """
+    lines = []
+    for kind, pointer, text in _iter_patch_targets(resume):
+        if kind == "value":
+            lines.append(f"{pointer}: {text}")
+        elif text is not None:
+            lines.append(text)
+    return "\n".join(lines)
+
+
+def _parse_path(path):
+    if not isinstance(path, str) or not path.startswith("/"):
+        raise ValueError(f"Invalid patch path: {path!r}")
+    parts = path[1:].split("/")
+    if parts[0] not in PATCHABLE_SECTIONS:
+        raise ValueError(f"Patch path outside patchable sections: {path}")
+    return [int(part) if part.isdigit() else part for part in parts]
+
+
+def _resolve_parent(doc, parts, path):
+    target = doc
+    for part in parts[:-1]:
+        try:
+            target = target[part]
+        except (KeyError, IndexError, TypeError):
+            raise ValueError(f"Patch path does not exist: {path}")
+    return target
+
+
+def validate_patch(resume, ops):
+    """
+    Check that `ops` is a list of JSON Patch replace/add/remove operations
+    on the values listed by list_patch_targets() (bullets, coursework, skills
+    lines; not company names, titles, dates or labels), with string values and
+    at most one replace or remove per value.
+    Returns the parsed operations; raises ValueError otherwise.
+    """
+    if isinstance(ops, dict) and isinstance(ops.get("patch"), list):
+        ops = ops["patch"]
+    if not isinstance(ops, list):
+        raise ValueError("Patch must be a list of operations")
+
+    values, lists = set(), set()
+    for kind, pointer, _ in _iter_patch_targets(resume):
+        (values if kind == "value" else lists).add(pointer)
+
+    parsed = []
+    changed = set()
+    for op in ops:
+        if not isinstance(op, dict) or op.get("op") not in PATCH_OPS:
+            raise ValueError(f"Unsupported patch operation: {op!r}")
+        path = op.get("path")
+        parts = _parse_path(path)
+        parent = _resolve_parent(resume, parts, path)
+        last = parts[-1]
+        if op["op"] == "add":
+            if path.rsplit("/", 1)[0] not in lists:
+                raise ValueError(f"add must target a bullet or coursework list: {path}")
+        elif path not in values:
+            raise ValueError(f"Patch path is not a patch target: {path}")
+        elif path in changed:
+            raise ValueError(f"Conflicting patch operations on {path}")
+        else:
+            changed.add(path)
+        if op["op"] in ("add", "remove"):
+            # Only lists of strings (bullet points, coursework) grow or shrink
+            if not isinstance(parent, list) or any(not isinstance(item, str) for item in parent):
+                raise ValueError(f"{op['op']} must target a list of strings: {path}")
+            if op["op"] == "add" and not (last == "-" or isinstance(last, int)):
+                raise ValueError(f"add must target a list position: {path}")
+            if op["op"] == "remove" and (not isinstance(last, int) or last >= len(parent)):
+                raise ValueError(f"Patch index out of range: {path}")
+        else:
+            try:
+                current = parent[last]
+            except (KeyError, IndexError, TypeError):
+                raise ValueError(f"Patch path does not exist: {path}")
+            if not isinstance(current, str):
+                raise ValueError(f"replace must target a text value: {path}")
+        if op["op"] != "remove" and not isinstance(op.get("value"), str):
+            raise ValueError(f"Patch value must be a string: {path}")
+        parsed.append((op["op"], parts, op.get("value")))
+    return parsed
+
+
+def apply_patch(resume, ops):
+    """
+    Validate and apply a patch to a copy of `resume`. All paths refer to the
+    original document (as listed by list_patch_targets): replacements are
+    applied first, then each list is rebuilt once from its original items,
+    so an add at index i lands before original item i whatever else was
+    removed or added in that list.
+    """
+    parsed = validate_patch(resume, ops)
+    patched = copy.deepcopy(resume)
+
+    for op, parts, value in parsed:
+        if op == "replace":
+            _resolve_parent(patched, parts, parts)[parts[-1]] = value
+
+    # Per list: original indices to drop, and values to insert before an index (or append)
+    edits = {}
+    for op, parts, value in parsed:
+        if op in ("add", "remove"):
+            removed, inserts = edits.setdefault(tuple(parts[:-1]), (set(), {}))
+            if op == "remove":
+                removed.add(parts[-1])
+            else:
+                inserts.setdefault(parts[-1], []).append(value)
+    for list_parts, (removed, inserts) in edits.items():
+        parent = _resolve_parent(patched, list(list_parts) + [None], list_parts)
+        rebuilt = []
+        for index, item in enumerate(parent):
+            rebuilt.extend(inserts.pop(index, []))
+            if index not in removed:
+                rebuilt.append(item)
+        # "-" and indices past the end append, in patch order
+        for values in inserts.values():
+            rebuilt.extend(values)
+        parent[:] = rebuilt
+
+    logging.info("Applied resume patch with %d operations.", len(parsed))
+    return patched
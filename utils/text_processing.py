@@ -1,42 +1,33 @@
-import re
-import nltk
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from utils import normalization
+from utils.normalization import lemmatize_token
 import logging
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logging.info("text_processing module loaded.")
 
-# Download necessary NLTK data
-nltk.download('wordnet', quiet=True)
-nltk.download('omw-1.4', quiet=True)
-
-lemmatizer = WordNetLemmatizer()
-
 def lemmatize_text(text):
     """Lemmatize the input text."""
-    tokens = text.split()
-    lemmatized_tokens = [lemmatizer.lemmatize(token) for token in tokens]
-    lemmatized = ' '.join(lemmatized_tokens)
-    logging.info("Lemmatized text: %s", lemmatized)
-    return lemmatized
+    return ' '.join(lemmatize_token(token) for token in text.split())
 
 def preprocess_text(text):
     """Lowercase, remove non-alphanumeric characters, and lemmatize."""
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    preprocessed = lemmatize_text(text)
-    logging.info("Preprocessed text: %s", preprocessed)
-    return preprocessed
+    return normalization.preprocess_text(text)
 
-def compute_matching_score(job_description, resume_text):
+def compute_matching_score(job_description, resume_text, index=None):
     """
     Compute the matching score between job description and resume using TF-IDF cosine similarity.
+    With a CorpusTfidfIndex, IDF weights come from every stored job description;
+    without one, a vectorizer is fit on just the two texts.
     Returns a score between 0 and 1.
     """
     try:
+        if index is not None:
+            score = index.score_pair(job_description, resume_text)
+            logging.info("Computed matching score: %f", score)
+            return score
+        # scikit-learn is only needed for this two-document fallback; import it on demand
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
         texts = [preprocess_text(job_description), preprocess_text(resume_text)]
         vectorizer = TfidfVectorizer()
         tfidf_matrix = vectorizer.fit_transform(texts)
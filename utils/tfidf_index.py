@@ -0,0 +1,131 @@
+import logging
+import math
+import threading
+from collections import Counter
+import numpy as np
+from utils.normalization import scoring_tokens
+from utils.persistence import PersistentIndex
+
+
+class CorpusTfidfIndex(PersistentIndex):
+    """
+    TF-IDF index over every stored job description.
+
+    Raw term counts and document frequencies are kept, so documents can be
+    added or removed incrementally; IDF weights (smoothed, as in scikit-learn's
+    TfidfVectorizer) are derived from the current corpus at scoring time.
+    """
+    LABEL = "TF-IDF index"
+
+    def __init__(self):
+        self.vocabulary = {}
+        self._df = []
+        self._rows = []
+        self._positions = {}
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_matrix"] = None
+        return state
+
+    @staticmethod
+    def _tokens(text):
+        return scoring_tokens(text or "")
+
+    def _idf_for_df(self, df):
+        n = len(self._positions)
+        return math.log((1 + n) / (1 + df)) + 1
+
+    def add_document(self, doc_id, text):
+        """Index one job description. Re-adding an existing doc_id is a no-op."""
+        doc_id = str(doc_id)
+        counts = Counter(self._tokens(text))
+        with self._lock:
+            if doc_id in self._positions:
+                return
+            cols, values = [], []
+            for term, count in counts.items():
+                col = self.vocabulary.get(term)
+                if col is None:
+                    col = len(self._df)
+                    self.vocabulary[term] = col
+                    self._df.append(0)
+                self._df[col] += 1
+                cols.append(col)
+                values.append(count)
+            self._positions[doc_id] = len(self._rows)
+            self._rows.append((doc_id, np.array(cols, dtype=np.int32), np.array(values, dtype=np.float64)))
+            self._matrix = None
+
+    def remove_document(self, doc_id):
+        """Drop a job description from the index, if present."""
+        with self._lock:
+            position = self._positions.pop(str(doc_id), None)
+            if position is None:
+                return
+            _, cols, _ = self._rows[position]
+            for col in cols:
+                self._df[col] -= 1
+            self._rows[position] = None
+            self._matrix = None
+
+    def _weighted_matrix(self):
+        """Row-normalized TF-IDF matrix of all rows (removed rows are empty). Call under lock."""
+        if self._matrix is None:
+            from scipy.sparse import csr_matrix
+            indptr, indices, data = [0], [], []
+            for row in self._rows:
+                if row is not None:
+                    indices.extend(row[1])
+                    data.extend(row[2])
+                indptr.append(len(indices))
+            counts = csr_matrix((data, indices, indptr), shape=(len(self._rows), len(self._df)))
+            idf = np.log((1 + len(self._positions)) / (1 + np.array(self._df, dtype=np.float64))) + 1
+            weighted = csr_matrix(counts.multiply(idf))
+            norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+            norms[norms == 0] = 1.0
+            self._matrix = (csr_matrix(weighted.multiply(1 / norms[:, None])), idf)
+        return self._matrix
+
+    def score_all(self, text):
+        """
+        Cosine similarity between `text` and every indexed job description in
+        one sparse matrix-vector product. Returns {doc_id: score}.
+        """
+        counts = Counter(self._tokens(text))
+        with self._lock:
+            if not self._positions:
+                return {}
+            matrix, idf = self._weighted_matrix()
+            query = np.zeros(len(self._df))
+            oov_norm = 0.0
+            for term, count in counts.items():
+                col = self.vocabulary.get(term)
+                if col is None:
+                    oov_norm += (count * self._idf_for_df(0)) ** 2
+                else:
+                    query[col] = count * idf[col]
+            positions = dict(self._positions)
+        query_norm = math.sqrt(float(query @ query) + oov_norm)
+        if query_norm == 0:
+            return dict.fromkeys(positions, 0.0)
+        scores = matrix @ (query / query_norm)
+        return {doc_id: float(scores[position]) for doc_id, position in positions.items()}
+
+    def score_pair(self, job_description, resume_text):
+        """Cosine similarity of two texts using the corpus IDF weights."""
+        jd_counts = Counter(self._tokens(job_description))
+        resume_counts = Counter(self._tokens(resume_text))
+        with self._lock:
+            idf = {term: self._idf_for_df(self._df[self.vocabulary[term]] if term in self.vocabulary else 0)
+                   for term in jd_counts.keys() | resume_counts.keys()}
+        jd_vec = {term: count * idf[term] for term, count in jd_counts.items()}
+        resume_vec = {term: count * idf[term] for term, count in resume_counts.items()}
+        dot = sum(weight * resume_vec.get(term, 0.0) for term, weight in jd_vec.items())
+        norm = math.sqrt(sum(w * w for w in jd_vec.values())) * math.sqrt(sum(w * w for w in resume_vec.values()))
+        return dot / norm if norm else 0.0